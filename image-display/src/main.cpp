@@ -15,6 +15,8 @@
 #include <numeric>
 #include <algorithm>
 #include <cmath>
+#include <cstdlib>
+#include <cstring>
 #include <thread>
 
 using namespace rgb_matrix;
@@ -31,6 +33,8 @@ bool zmq_connected = false;
 std::string current_zmq_connection = "";
 bool connection_change_queued = false;
 std::string new_address = "";
+// Topic of the display profile to show, set FRAME_TOPIC to follow another profile
+std::string frame_topic = "/frames";
 
 
 // Define the GPIO pin number
@@ -91,8 +95,8 @@ void ConnectToZmq(const std::string &address) {
         spdlog::info("Connected to zmq source: {}", address);
         zmq_connected = true;
         
-        subscriber.setsockopt(ZMQ_SUBSCRIBE, "/frames", 7);
-        spdlog::info("Subscribed to /frames");
+        subscriber.setsockopt(ZMQ_SUBSCRIBE, frame_topic.data(), frame_topic.size());
+        spdlog::info("Subscribed to {}", frame_topic);
         current_zmq_connection = address;  
     } catch (const zmq::error_t &e) {
          spdlog::error("ZMQ Exception: {} ({})", e.what(), zmq_strerror(e.num()));
@@ -128,6 +132,182 @@ void CopyImageToCanvas(const Magick::Image &image, Canvas *canvas)
     }
 }
 
+// Non-PNG frames carry a small header, see image-sender/image_utils/frame_format.py
+const char frame_magic[3] = {'J', 'B', 'F'};
+const uint8_t frame_header_version = 1;
+const size_t frame_header_size = 9;
+const uint8_t frame_format_rgb888 = 1;
+const uint8_t frame_format_tile_delta = 2;
+const uint8_t frame_format_rgb565 = 3;
+const size_t tile_delta_header_size = 3;
+// Optional envelope ahead of the payload when the sender runs with FRAME_ENVELOPE=1,
+// either as its own message part or straight after the topic when conflating
+const char frame_envelope_magic[3] = {'J', 'B', 'E'};
+const uint8_t frame_envelope_version = 1;
+const size_t frame_envelope_size = 21;
+
+struct FrameEnvelope {
+    uint8_t format;
+    uint64_t sequence;
+    uint64_t timestamp_ns;
+};
+
+struct FrameHeader {
+    uint8_t format;
+    uint16_t width;
+    uint16_t height;
+};
+
+// Last received frame in RGB888, tile deltas are applied on top of it
+struct FrameBuffer {
+    uint16_t width = 0;
+    uint16_t height = 0;
+    std::vector<uint8_t> pixels;
+};
+
+uint16_t ReadUint16(const uint8_t *data) {
+    return data[0] | (data[1] << 8);
+}
+
+uint64_t ReadUint64(const uint8_t *data) {
+    uint64_t value = 0;
+    for (int i = 7; i >= 0; --i) {
+        value = (value << 8) | data[i];
+    }
+    return value;
+}
+
+bool ParseFrameEnvelope(const uint8_t *data, size_t size, FrameEnvelope &envelope) {
+    if (size < frame_envelope_size || std::memcmp(data, frame_envelope_magic, sizeof(frame_envelope_magic)) != 0) {
+        return false;
+    }
+    if (data[3] != frame_envelope_version) {
+        spdlog::warn("Unsupported frame envelope version: {}", data[3]);
+        return false;
+    }
+    envelope.format = data[4];
+    envelope.sequence = ReadUint64(data + 5);
+    envelope.timestamp_ns = ReadUint64(data + 13);
+    return true;
+}
+
+// Counts frames lost between sender and display, and logs the sender to display latency
+struct SequenceTracker {
+    uint64_t last_sequence = 0;
+    uint64_t missing_frames = 0;
+
+    void Update(const FrameEnvelope &envelope) {
+        if (last_sequence != 0 && envelope.sequence > last_sequence + 1) {
+            missing_frames += envelope.sequence - last_sequence - 1;
+            spdlog::debug("Missed {} frames before frame {}", envelope.sequence - last_sequence - 1, envelope.sequence);
+        }
+        last_sequence = envelope.sequence;
+        auto now_ns = std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::system_clock::now().time_since_epoch()).count();
+        spdlog::trace("Frame {} latency: {:.2f}ms", envelope.sequence, (now_ns - static_cast<int64_t>(envelope.timestamp_ns)) / 1e6);
+    }
+};
+
+bool ReceiveMore(zmq::message_t &part) {
+    return subscriber.getsockopt<int>(ZMQ_RCVMORE) && subscriber.recv(&part);
+}
+
+bool ParseFrameHeader(const uint8_t *data, size_t size, FrameHeader &header) {
+    if (size < frame_header_size || std::memcmp(data, frame_magic, sizeof(frame_magic)) != 0) {
+        return false;
+    }
+    if (data[3] != frame_header_version) {
+        spdlog::warn("Unsupported frame header version: {}", data[3]);
+        return false;
+    }
+    header.format = data[4];
+    header.width = ReadUint16(data + 5);
+    header.height = ReadUint16(data + 7);
+    return true;
+}
+
+bool DecodeRGB888(const FrameHeader &header, const uint8_t *data, size_t size, FrameBuffer &frame) {
+    size_t expected_size = static_cast<size_t>(header.width) * header.height * 3;
+    if (size != expected_size) {
+        spdlog::warn("RGB888 frame has {} bytes, expected {}", size, expected_size);
+        return false;
+    }
+    frame.width = header.width;
+    frame.height = header.height;
+    frame.pixels.assign(data, data + size);
+    return true;
+}
+
+bool DecodeRGB565(const FrameHeader &header, const uint8_t *data, size_t size, FrameBuffer &frame) {
+    size_t pixel_count = static_cast<size_t>(header.width) * header.height;
+    if (size != pixel_count * 2) {
+        spdlog::warn("RGB565 frame has {} bytes, expected {}", size, pixel_count * 2);
+        return false;
+    }
+    frame.width = header.width;
+    frame.height = header.height;
+    frame.pixels.resize(pixel_count * 3);
+    for (size_t i = 0; i < pixel_count; ++i) {
+        uint16_t pixel = ReadUint16(data + 2 * i);
+        uint8_t red = pixel >> 11, green = (pixel >> 5) & 0x3F, blue = pixel & 0x1F;
+        // Repeat the top bits into the low ones so full intensity stays 255
+        frame.pixels[3 * i] = (red << 3) | (red >> 2);
+        frame.pixels[3 * i + 1] = (green << 2) | (green >> 4);
+        frame.pixels[3 * i + 2] = (blue << 3) | (blue >> 2);
+    }
+    return true;
+}
+
+bool ApplyTileDelta(const FrameHeader &header, const uint8_t *data, size_t size, FrameBuffer &frame) {
+    if (frame.pixels.empty() || frame.width != header.width || frame.height != header.height) {
+        spdlog::debug("Skipping tile delta until a keyframe arrives");
+        return false;
+    }
+    if (size < tile_delta_header_size) {
+        spdlog::warn("Tile delta frame too short: {} bytes", size);
+        return false;
+    }
+    size_t tile_size = data[0];
+    size_t tile_count = ReadUint16(data + 1);
+    size_t tile_bytes = tile_size * tile_size * 3;
+    if (tile_size == 0 || size != tile_delta_header_size + tile_count * (4 + tile_bytes)) {
+        spdlog::warn("Tile delta frame has {} bytes for {} tiles", size, tile_count);
+        return false;
+    }
+
+    const uint8_t *indices = data + tile_delta_header_size;
+    const uint8_t *tiles = indices + tile_count * 4;
+    for (size_t i = 0; i < tile_count; ++i) {
+        size_t tile_x = ReadUint16(indices + 4 * i) * tile_size;
+        size_t tile_y = ReadUint16(indices + 4 * i + 2) * tile_size;
+        if (tile_x + tile_size > frame.width || tile_y + tile_size > frame.height) {
+            spdlog::warn("Tile delta index out of bounds");
+            return false;
+        }
+        const uint8_t *tile = tiles + i * tile_bytes;
+        for (size_t row = 0; row < tile_size; ++row) {
+            std::memcpy(&frame.pixels[((tile_y + row) * frame.width + tile_x) * 3], tile + row * tile_size * 3, tile_size * 3);
+        }
+    }
+    return true;
+}
+
+void CopyFrameBufferToCanvas(const FrameBuffer &frame, Canvas *canvas)
+{
+    if (frame.width == canvas->width() && frame.height == canvas->height()) {
+        // Fast path, no decode or scaling needed
+        for (int y = 0; y < frame.height; ++y) {
+            const uint8_t *row = &frame.pixels[y * frame.width * 3];
+            for (int x = 0; x < frame.width; ++x) {
+                canvas->SetPixel(x, y, row[3 * x], row[3 * x + 1], row[3 * x + 2]);
+            }
+        }
+    } else {
+        Magick::Image image(frame.width, frame.height, "RGB", Magick::CharPixel, frame.pixels.data());
+        image.scale(Magick::Geometry(canvas->width(), canvas->height()));
+        CopyImageToCanvas(image, canvas);
+    }
+}
+
 void ComputeStatistics(const std::vector<double> &fps_values) {
     if (fps_values.empty()) {
         spdlog::warn("No data to compute statistics for.");
@@ -180,6 +360,11 @@ int main(int argc, char *argv[]) {
         return 1;
     }
 
+    const char *topic = getenv("FRAME_TOPIC");
+    if (topic != nullptr) {
+        frame_topic = topic;
+    }
+
     int timeout_ms = 1000;
     subscriber.setsockopt(ZMQ_RCVTIMEO, &timeout_ms, sizeof(timeout_ms));
     ConnectToZmq(default_address); // Connect to the initial address
@@ -188,6 +373,8 @@ int main(int argc, char *argv[]) {
     auto last_update_time = std::chrono::steady_clock::now();
 
     std::vector<double> fps_values; // Vector to hold FPS values
+    FrameBuffer frame_buffer;
+    SequenceTracker sequence_tracker;
 
     while (!console_interrupt_received) {
         auto start_time = std::chrono::steady_clock::now();
@@ -206,23 +393,62 @@ int main(int argc, char *argv[]) {
         }
         auto received_time = std::chrono::steady_clock::now();
 
-        if(new_frame_received){
+        if(new_frame_received && update.size() >= frame_topic.size()){
             // Extract image data from message (assuming the first part is the channel)
-            std::string image_data(static_cast<char*>(update.data()) + 7, update.size() - 7);
-
-            // Convert binary PNG data to Magick::Image
-            Magick::Blob blob(image_data.data(), image_data.size());
-            Magick::Image image;
-            try {
-                image.read(blob);
-            } catch (const Magick::Exception &e) {
-                // Handle error...
-                continue;
+            const uint8_t *payload = static_cast<const uint8_t*>(update.data()) + frame_topic.size();
+            size_t payload_size = update.size() - frame_topic.size();
+
+            FrameEnvelope envelope;
+            zmq::message_t envelope_part;
+            zmq::message_t payload_part;
+            if (ReceiveMore(envelope_part) && ReceiveMore(payload_part)) {
+                // Multipart: topic, envelope, payload
+                if (ParseFrameEnvelope(static_cast<const uint8_t*>(envelope_part.data()), envelope_part.size(), envelope)) {
+                    sequence_tracker.Update(envelope);
+                }
+                payload = static_cast<const uint8_t*>(payload_part.data());
+                payload_size = payload_part.size();
+            } else if (ParseFrameEnvelope(payload, payload_size, envelope)) {
+                sequence_tracker.Update(envelope);
+                payload += frame_envelope_size;
+                payload_size -= frame_envelope_size;
             }
 
-            //Scale image to fit the display
-            image.scale(Magick::Geometry(matrix->width(), matrix->height()));
-            CopyImageToCanvas(image, offscreen_canvas);
+            FrameHeader header;
+            if (ParseFrameHeader(payload, payload_size, header)) {
+                const uint8_t *body = payload + frame_header_size;
+                size_t body_size = payload_size - frame_header_size;
+                bool decoded = false;
+                if (header.format == frame_format_rgb888) {
+                    decoded = DecodeRGB888(header, body, body_size, frame_buffer);
+                } else if (header.format == frame_format_rgb565) {
+                    decoded = DecodeRGB565(header, body, body_size, frame_buffer);
+                } else if (header.format == frame_format_tile_delta) {
+                    decoded = ApplyTileDelta(header, body, body_size, frame_buffer);
+                } else {
+                    spdlog::warn("Unsupported frame format: {}", header.format);
+                }
+                if (!decoded) {
+                    continue;
+                }
+                CopyFrameBufferToCanvas(frame_buffer, offscreen_canvas);
+            } else {
+                // PNG frames replace the frame buffer, so drop it until the next keyframe
+                frame_buffer.pixels.clear();
+                // Convert binary PNG data to Magick::Image
+                Magick::Blob blob(payload, payload_size);
+                Magick::Image image;
+                try {
+                    image.read(blob);
+                } catch (const Magick::Exception &e) {
+                    // Handle error...
+                    continue;
+                }
+
+                //Scale image to fit the display
+                image.scale(Magick::Geometry(matrix->width(), matrix->height()));
+                CopyImageToCanvas(image, offscreen_canvas);
+            }
             offscreen_canvas = matrix->SwapOnVSync(offscreen_canvas);
             //No need to sleep, as we'll just wait for the next image
 
@@ -243,6 +469,7 @@ int main(int argc, char *argv[]) {
         
         if(connection_change_queued){
             matrix->Clear();
+            frame_buffer.pixels.clear();
             ConnectToZmq(new_address);
             connection_change_queued = false;
             new_address = "";
@@ -254,6 +481,7 @@ int main(int argc, char *argv[]) {
     matrix->Clear();
     gpioTerminate(); // Cleanup and stop pigpio
     ComputeStatistics(fps_values); // Compute and output the statistics
+    spdlog::info("Frames missed by the display: {}", sequence_tracker.missing_frames);
 
 
     std::cout << "Exiting";
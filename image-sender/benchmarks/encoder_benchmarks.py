@@ -0,0 +1,61 @@
+import logging
+import sys
+import time
+from PIL.Image import Image
+
+from benchmarks.source_benchmarks import SOURCES
+from benchmarks.timing import FakeClock, summarize_ms
+from image_utils.frame_format import FrameDecoder, FrameFormat, get_frame_encoder
+
+logger = logging.getLogger(__name__)
+
+# Sparse text that changes every frame, and a full-frame dial with moving hands
+CONTENT_SOURCES = ("Clock", "Analog Clock")
+
+def render_frames(name: str, frames: int) -> list[Image]:
+    create, _ = SOURCES[name]
+    clock = FakeClock()
+    source = create()
+    rendered = []
+    with clock.patch(sys.modules[type(source).__module__]):
+        source.__enter__()
+        try:
+            for _ in range(frames):
+                # Sources may draw into the same image every frame
+                rendered.append(source.create_frame().copy())
+                clock.advance(1.0 / source.frame_rate)
+        finally:
+            source.__exit__(None, None, None)
+    return rendered
+
+def benchmark_encoder(frame_format: FrameFormat, images: list[Image]) -> dict:
+    encoder = get_frame_encoder(frame_format)
+    decoder = FrameDecoder()
+    encode_samples = []
+    decode_samples = []
+    encoded_bytes = 0
+    for image in images:
+        start_time = time.perf_counter()
+        payload = encoder.encode(image)
+        encode_samples.append(time.perf_counter() - start_time)
+        encoded_bytes += len(payload)
+
+        start_time = time.perf_counter()
+        decoder.decode(payload)
+        decode_samples.append(time.perf_counter() - start_time)
+
+    result = summarize_ms(encode_samples)
+    decode = summarize_ms(decode_samples)
+    result["decode_mean_ms"] = decode["mean_ms"]
+    result["decode_p95_ms"] = decode["p95_ms"]
+    result["mean_bytes"] = encoded_bytes / len(images)
+    return result
+
+def run_encoder_benchmarks(frames: int) -> dict:
+    results = {}
+    for content in CONTENT_SOURCES:
+        images = render_frames(content, frames)
+        for frame_format in FrameFormat:
+            logger.info(f"Benchmarking {frame_format.name} encoding of {content} frames")
+            results[f"encoder/{frame_format.name}/{content}"] = benchmark_encoder(frame_format, images)
+    return results
@@ -0,0 +1,61 @@
+import logging
+import os
+import tempfile
+import time
+
+import log_config
+from benchmarks.timing import summarize_ms
+
+logger = logging.getLogger("benchmarks.frame_loop")
+
+# (mode, per call site rate limit, sampled at the call site), None leaves the root
+# logger above DEBUG as a baseline
+LOGGING_MODES = {
+    "off": None,
+    "memory": ("memory", 0, False),
+    "ring": ("ring", 0, False),
+    "ring_rate_limited": ("ring", 2, False),
+    "ring_sampled": ("ring", 0, True)
+}
+
+def log_frame(i: int, frame_time: float) -> None:
+    # The debug records a Count frame produces on its way through the FrameMaker
+    logger.debug("Sending text: %s", f"i: {i}")
+    logger.debug("Frame to frame time: %.3f ms", frame_time)
+
+def benchmark_logging_mode(settings: tuple[str, float, bool] | None, frames: int) -> dict:
+    root_logger = logging.getLogger()
+    original_handlers, original_level = root_logger.handlers[:], root_logger.level
+    with tempfile.TemporaryDirectory() as log_dir:
+        handler = None
+        sampler = None
+        if settings is None:
+            root_logger.setLevel(logging.INFO)
+        else:
+            mode, rate_limit, sampled = settings
+            handler = log_config.setup_logging(os.path.join(log_dir, "benchmark.log"), mode=mode, rate_limit=rate_limit)
+            if sampled:
+                sampler = log_config.LogSampler()
+        try:
+            samples = []
+            for i in range(frames):
+                start_time = time.perf_counter()
+                if sampler is None or sampler.ready():
+                    log_frame(i, 16.667)
+                samples.append(time.perf_counter() - start_time)
+        finally:
+            if handler is not None:
+                handler.close()
+                for target in getattr(handler, "targets", [getattr(handler, "target", None)]):
+                    if target is not None:
+                        target.close()
+            root_logger.handlers[:] = original_handlers
+            root_logger.setLevel(original_level)
+    result = summarize_ms(samples)
+    result["mean_us"] = 1000 * result["mean_ms"]
+    return result
+
+def run_logging_benchmarks(frames: int) -> dict:
+    # Far more frames than the other suites, the per-frame cost is a few microseconds
+    frames = max(frames, 20000)
+    return {f"logging/{name}": benchmark_logging_mode(settings, frames) for name, settings in LOGGING_MODES.items()}
@@ -0,0 +1,94 @@
+import logging
+import time
+import zmq
+
+from benchmarks.source_benchmarks import EXCLUDED_SOURCES, use_canned_flights
+from benchmarks.timing import get_percentile
+from frame_subscriber import FrameStats, split_message
+from image_utils.frame_format import InvalidFrameException
+from pipeline_config import PipelineConfig
+from source_registry import SOURCE_SPECS
+
+logger = logging.getLogger(__name__)
+
+# Every registered source but the excluded ones, run end to end on the real clock
+PIPELINE_SOURCES = tuple(name for name in SOURCE_SPECS if name not in EXCLUDED_SOURCES)
+
+def wait_for_switch(controller, name: str, timeout: float) -> bool:
+    # Switches are prepared in the background, current_source follows the cut over
+    deadline = time.monotonic() + timeout
+    while controller.current_source != name:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+def receive_frames(sock: zmq.Socket, topic: bytes, duration: float) -> FrameStats:
+    stats = FrameStats()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            parts = sock.recv_multipart()
+            received_ns = time.time_ns()
+        except zmq.Again:
+            continue
+        try:
+            envelope, payload = split_message(parts, topic)
+        except InvalidFrameException:
+            continue
+        stats.add(envelope, len(payload), received_ns)
+    return stats
+
+def run_pipeline_benchmark(duration: float, address: str = "tcp://localhost:5555") -> dict:
+    use_canned_flights()
+    from input_controller import InputController, InvalidSourceException
+    from reddit_utils.test_text_source import TestTextSource
+
+    # The configured pipeline, with envelopes on so latency and gaps can be measured
+    config = PipelineConfig.from_env()._replace(frame_envelope=True, metrics_port=0)
+    topic = b"/frames" if config.display_profiles is None else config.display_profiles[0].topic.encode("ascii")
+    controller = InputController(PIPELINE_SOURCES[0], config)
+    controller.sources["ScrollingText"].text_source = TestTextSource()
+
+    context = zmq.Context()
+    sock = context.socket(zmq.SUB)
+    sock.setsockopt(zmq.SUBSCRIBE, topic)
+    sock.setsockopt(zmq.RCVTIMEO, 100)
+    sock.connect(address)
+
+    results = {f"pipeline/{name}": {"skipped": reason} for name, reason in EXCLUDED_SOURCES.items()}
+    controller.start()
+    try:
+        for name in PIPELINE_SOURCES:
+            logger.info(f"Benchmarking {name} through the pipeline")
+            if controller.current_source != name:
+                try:
+                    controller.set_source(name)
+                except InvalidSourceException as e:
+                    results[f"pipeline/{name}"] = {"error": str(e)}
+                    continue
+                if not wait_for_switch(controller, name, config.source_ready_timeout + 5.0):
+                    results[f"pipeline/{name}"] = {"error": f"Switch to {name} did not complete, still on {controller.current_source}"}
+                    continue
+            # Let the source start up and the subscription settle before measuring
+            receive_frames(sock, topic, 1.0)
+            stats = receive_frames(sock, topic, duration)
+            if stats.frames == 0:
+                results[f"pipeline/{name}"] = {"error": "No frames received"}
+                continue
+            latencies = sorted(stats.latencies)
+            results[f"pipeline/{name}"] = {
+                "frames": stats.frames,
+                "fps": stats.frames / duration,
+                "latency_p50_ms": get_percentile(latencies, 50),
+                "latency_p95_ms": get_percentile(latencies, 95),
+                "latency_max_ms": latencies[-1],
+                "gaps": stats.gaps,
+                "missing_frames": stats.missing_frames,
+                "mean_bytes": stats.payload_bytes / stats.frames
+            }
+    finally:
+        controller.stop()
+        sock.close()
+        context.term()
+    return results
@@ -0,0 +1,130 @@
+# Offline benchmarks for the frame sources, the frame encodings, logging and the whole pipeline.
+# Run from the image-sender directory:
+#   python -m benchmarks.run_benchmarks --output before.json
+#   python -m benchmarks.run_benchmarks --output after.json
+#   python -m benchmarks.run_benchmarks --compare before.json after.json
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import platform
+import sys
+
+from benchmarks.encoder_benchmarks import run_encoder_benchmarks
+from benchmarks.logging_benchmark import run_logging_benchmarks
+from benchmarks.source_benchmarks import run_source_benchmarks
+
+RESULTS_VERSION = 1
+SUITES = ("sources", "encoders", "logging", "pipeline")
+
+def is_lower_better(metric: str) -> bool | None:
+    # None for metrics that describe the run rather than its performance, and
+    # for single worst-case samples, which are too noisy to gate on
+    if metric in ("budget_ms", "max_ms", "latency_max_ms"):
+        return None
+    if metric.endswith("_ms") or metric.endswith("_us") or metric.endswith("_bytes") or metric in ("gaps", "missing_frames"):
+        return True
+    if metric == "fps":
+        return False
+    return None
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name}: new")
+            continue
+        if "skipped" in result:
+            print(f"{name}: skipped, {result['skipped']}")
+            continue
+        if "skipped" in base:
+            print(f"{name}: skipped in the baseline")
+            continue
+        if "error" in result or "error" in base:
+            print(f"{name}: {result.get('error', 'ok')} (was {base.get('error', 'ok')})")
+            if "error" in result and "error" not in base:
+                regressions.append(f"{name}: {result['error']}")
+            continue
+
+        for metric, value in result.items():
+            lower_is_better = is_lower_better(metric)
+            if lower_is_better is None or metric not in base:
+                continue
+            old = base[metric]
+            change = (value - old) / old if old != 0 else (0.0 if value == 0 else float("inf"))
+            worse = change > threshold if lower_is_better else change < -threshold
+            # Sub-millisecond timings jitter by more than the threshold between runs
+            if worse and metric.endswith("_ms") and abs(value - old) < min_delta_ms:
+                worse = False
+            flag = "  REGRESSION" if worse else ""
+            print(f"{name} {metric}: {old:.3f} -> {value:.3f} ({change:+.1%}){flag}")
+            if worse:
+                regressions.append(f"{name} {metric}: {old:.3f} -> {value:.3f} ({change:+.1%})")
+
+    for name in sorted(set(baseline["results"]) - set(current["results"])):
+        print(f"{name}: missing from the current run")
+    return regressions
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    if "sources" in args.suites:
+        results.update(run_source_benchmarks(args.frames, args.warmup))
+    if "encoders" in args.suites:
+        results.update(run_encoder_benchmarks(args.frames))
+    if "logging" in args.suites:
+        results.update(run_logging_benchmarks(args.frames))
+    if "pipeline" in args.suites:
+        # Imported here, the pipeline needs every source's dependencies
+        from benchmarks.pipeline_benchmark import run_pipeline_benchmark
+        try:
+            results.update(run_pipeline_benchmark(args.duration))
+        except Exception as e:
+            logging.getLogger(__name__).warning("Pipeline benchmark failed", exc_info=True)
+            results["pipeline"] = {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {"frames": args.frames, "warmup": args.warmup, "duration": args.duration},
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame source, encoder and pipeline benchmarks")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--frames", type=int, default=600, help="Frames timed per source and encoding")
+    parser.add_argument("--warmup", type=int, default=60, help="Untimed frames before each source is timed")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds each source runs through the pipeline")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Smaller timing changes are never regressions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(name)s - %(levelname)s - %(message)s")
+
+    if args.compare is not None:
+        with open(args.compare[0]) as baseline_file, open(args.compare[1]) as current_file:
+            baseline, current = json.load(baseline_file), json.load(current_file)
+        if baseline.get("version") != RESULTS_VERSION or current.get("version") != RESULTS_VERSION:
+            sys.exit(f"Can only compare version {RESULTS_VERSION} result files")
+        regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions")
+        return
+
+    results = run(args)
+    for name, result in results["results"].items():
+        print(f"{name}: {json.dumps(result)}")
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+if __name__ == "__main__":
+    main()
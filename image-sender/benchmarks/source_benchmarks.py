@@ -0,0 +1,119 @@
+import logging
+import os
+import sys
+import time
+from typing import Callable
+
+from benchmarks.timing import FakeClock, summarize_ms
+from frame_sources.frame_source import FrameSource
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+def use_canned_flights() -> None:
+    # Boston area box and a recorded feed response, so the flight board runs offline
+    os.environ["FLIGHT_FEED_REPLAY_PATH"] = os.path.join(DATA_DIR, "flight_feed.jsonl")
+    for name, value in (("X1", "-71.6"), ("Y1", "42.0"), ("X2", "-70.6"), ("Y2", "42.7"), ("X", "-71.06"), ("Y", "42.36")):
+        os.environ.setdefault(name, value)
+
+def create_clock() -> FrameSource:
+    from frame_sources.clock_frame_source import ClockFrameSource
+    return ClockFrameSource()
+
+def create_count() -> FrameSource:
+    from frame_sources.count_frame_source import CountFrameSource
+    return CountFrameSource()
+
+def create_square() -> FrameSource:
+    from frame_sources.moving_green_square_source import MovingSquareSource
+    return MovingSquareSource()
+
+def create_analog_clock() -> FrameSource:
+    from frame_sources.analog_clock_frame_source import AnalogClockFrameSource
+    return AnalogClockFrameSource()
+
+def create_scrolling_text() -> FrameSource:
+    from frame_sources.scrolling_text_frame_source import ScrollingTextFrameSource
+    from reddit_utils.test_text_source import TestTextSource
+    source = ScrollingTextFrameSource()
+    source.text_source = TestTextSource()
+    return source
+
+def create_flight_data() -> FrameSource:
+    use_canned_flights()
+    from frame_sources.flight_data_frame_source import FlightDataFrameSource
+    return FlightDataFrameSource()
+
+def create_compositor() -> FrameSource:
+    from frame_sources.compositor_frame_source import CompositorFrameSource
+    return CompositorFrameSource()
+
+def scrolling_text_ready(source) -> bool:
+    # Enough text for the benchmark to scroll through without running dry
+    return source.strip.written >= source.strip.capacity // 2
+
+def flight_data_ready(source) -> bool:
+    return len(source.flight_data) > 0
+
+SOURCES: dict[str, tuple[Callable[[], FrameSource], Callable[[FrameSource], bool] | None]] = {
+    "Clock": (create_clock, None),
+    "Count": (create_count, None),
+    "Square": (create_square, None),
+    "Analog Clock": (create_analog_clock, None),
+    "Scrolling Text": (create_scrolling_text, scrolling_text_ready),
+    "Flight Data": (create_flight_data, flight_data_ready),
+    "Compositor": (create_compositor, None)
+}
+
+# Registered sources left out of the benchmarks, reported as skipped with the reason
+EXCLUDED_SOURCES = {
+    "Camera": "needs a USB camera, there is no offline capture to replay"
+}
+
+def wait_until_ready(source: FrameSource, ready: Callable[[FrameSource], bool], timeout: float = 5.0) -> None:
+    # Background threads fill in the source's data on the real clock
+    deadline = time.monotonic() + timeout
+    while not ready(source):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{source.name} had no data after {timeout}s")
+        time.sleep(0.01)
+
+def benchmark_source(name: str, frames: int, warmup: int) -> dict:
+    create, ready = SOURCES[name]
+    clock = FakeClock()
+    source = create()
+    # A compositor's layers render on the same clock as the compositor
+    layer_sources = [state.source for state in getattr(source, "layers", [])]
+    with clock.patch(*(sys.modules[type(frame_source).__module__] for frame_source in [source] + layer_sources)):
+        source.__enter__()
+        try:
+            if ready is not None:
+                wait_until_ready(source, ready)
+            interval = 1.0 / source.frame_rate
+            samples = []
+            for i in range(warmup + frames):
+                start_time = time.perf_counter()
+                source.create_frame()
+                if i >= warmup:
+                    samples.append(time.perf_counter() - start_time)
+                clock.advance(interval)
+        finally:
+            source.__exit__(None, None, None)
+    result = summarize_ms(samples)
+    result["budget_ms"] = 1000 * interval
+    return result
+
+def run_source_benchmarks(frames: int, warmup: int, names: list[str] | None = None) -> dict:
+    results = {}
+    if names is None:
+        for name, reason in EXCLUDED_SOURCES.items():
+            results[f"source/{name}"] = {"skipped": reason}
+    for name in names or SOURCES:
+        logger.info(f"Benchmarking {name} source")
+        try:
+            results[f"source/{name}"] = benchmark_source(name, frames, warmup)
+        except Exception as e:
+            logger.warning(f"{name} source failed", exc_info=True)
+            results[f"source/{name}"] = {"error": f"{type(e).__name__}: {e}"}
+    return results
@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+import datetime
+import math
+import time
+from types import ModuleType, SimpleNamespace
+
+class FakeClock:
+    # Stands in for the wall and monotonic clocks of the modules under test, so every run
+    # renders the same sequence of frames. time.sleep stays real for background threads.
+    def __init__(self, start: datetime.datetime = datetime.datetime(2024, 1, 1, 15, 8, 0, tzinfo=datetime.timezone.utc)):
+        self.wall_start = start.timestamp()
+        self.elapsed = 0.0
+
+    def advance(self, seconds: float) -> None:
+        self.elapsed += seconds
+
+    def monotonic(self) -> float:
+        return 1000.0 + self.elapsed
+
+    def time(self) -> float:
+        return self.wall_start + self.elapsed
+
+    def time_ns(self) -> int:
+        return int(self.time() * 1e9)
+
+    def get_datetime_class(self) -> type:
+        clock = self
+
+        class FakeDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.datetime.fromtimestamp(clock.time(), tz)
+        return FakeDatetime
+
+    @contextmanager
+    def patch(self, *modules: ModuleType):
+        fake_time = SimpleNamespace(**{name: getattr(time, name) for name in dir(time) if not name.startswith("_")})
+        fake_time.monotonic = self.monotonic
+        fake_time.time = self.time
+        fake_time.time_ns = self.time_ns
+        fake_datetime = self.get_datetime_class()
+
+        originals = []
+        for module in modules:
+            # Modules import either the time module or the datetime class by name
+            if getattr(module, "time", None) is time:
+                originals.append((module, "time", time))
+                module.time = fake_time
+            if getattr(module, "datetime", None) is datetime.datetime:
+                originals.append((module, "datetime", datetime.datetime))
+                module.datetime = fake_datetime
+        try:
+            yield self
+        finally:
+            for module, name, original in originals:
+                setattr(module, name, original)
+
+def get_percentile(samples: list[float], percentile: float) -> float:
+    # samples must be sorted
+    return samples[max(math.ceil(percentile / 100 * len(samples)) - 1, 0)]
+
+def summarize_ms(samples: list[float]) -> dict:
+    # samples in seconds
+    samples = sorted(1000 * sample for sample in samples)
+    return {
+        "frames": len(samples),
+        "mean_ms": sum(samples) / len(samples),
+        "p50_ms": get_percentile(samples, 50),
+        "p95_ms": get_percentile(samples, 95),
+        "max_ms": samples[-1]
+    }
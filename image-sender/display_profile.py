@@ -0,0 +1,88 @@
+import time
+from typing import NamedTuple, Tuple
+import PIL.Image
+from PIL.Image import Image as PILImage
+
+from image_utils.frame_format import FrameEnvelope, FrameFormat, get_frame_encoder, get_frame_format
+
+DEFAULT_PROFILE_NAME = "default"
+
+class InvalidDisplayProfileException(Exception):
+    pass
+
+class DisplayProfile(NamedTuple):
+    name: str
+    # None sends frames at the source's own size
+    size: Tuple[int, int] | None
+    frame_format: FrameFormat
+
+    @property
+    def topic(self) -> str:
+        # The original display subscribes to /frames, the default profile stays there
+        return "/frames" if self.name == DEFAULT_PROFILE_NAME else f"/{self.name}/frames"
+
+def parse_display_profiles(spec: str) -> Tuple[DisplayProfile, ...]:
+    # name:WIDTHxHEIGHT:format entries separated by commas, e.g. "default:128x128:png,wide:256x64:rgb565"
+    profiles = []
+    for entry in spec.split(","):
+        if entry.strip() == "":
+            continue
+        try:
+            name, size, frame_format = (part.strip() for part in entry.split(":"))
+            width, height = (int(dimension) for dimension in size.lower().split("x"))
+        except ValueError:
+            raise InvalidDisplayProfileException(f"Invalid display profile: {entry}")
+        if name == "" or "/" in name:
+            raise InvalidDisplayProfileException(f"Invalid display profile name: {name}")
+        profiles.append(DisplayProfile(name, (width, height), get_frame_format(frame_format)))
+
+    names = [profile.name for profile in profiles]
+    if len(names) == 0 or len(set(names)) != len(names):
+        raise InvalidDisplayProfileException(f"Display profiles need at least one entry and unique names: {spec}")
+    return tuple(profiles)
+
+class ProfileEncoder:
+    def __init__(self, profile: DisplayProfile, keyframe_interval: int = 60):
+        self.profile = profile
+        self.topic = profile.topic.encode("ascii")
+        self.encoder = get_frame_encoder(profile.frame_format, keyframe_interval=keyframe_interval)
+        self.frames = 0
+        self.encode_time = 0.0
+        self.encoded_bytes = 0
+
+    def encode(self, image: PILImage) -> bytes:
+        start_time = time.perf_counter()
+        payload = self.encoder.encode(image)
+        self.encode_time += time.perf_counter() - start_time
+        self.frames += 1
+        self.encoded_bytes += len(payload)
+        return payload
+
+    def get_envelope(self, timestamp_ns: int) -> bytes:
+        # Sequence numbers count encoded frames, a gap means a frame was lost after encoding
+        return FrameEnvelope(self.frames, timestamp_ns, self.profile.frame_format).pack()
+
+    def reset(self) -> None:
+        self.encoder.reset()
+
+    def force_keyframe(self) -> None:
+        self.encoder.force_keyframe()
+
+    def get_stats(self) -> dict:
+        return {
+            "Topic": self.profile.topic,
+            "Format": self.profile.frame_format.name,
+            "EncodedFrames": self.frames,
+            "MeanEncodeMs": 1000 * self.encode_time / self.frames if self.frames > 0 else 0.0,
+            "MeanBytes": self.encoded_bytes / self.frames if self.frames > 0 else 0.0,
+            "TotalBytes": self.encoded_bytes
+        }
+
+def scale_for_profiles(image: PILImage, profiles: list[ProfileEncoder]) -> dict[Tuple[int, int], PILImage]:
+    # One scaled copy per distinct size, shared by every profile that wants it
+    scaled = {image.size: image}
+    for profile_encoder in profiles:
+        size = profile_encoder.profile.size
+        if size is not None and size not in scaled:
+            scaled[size] = image.resize(size, PIL.Image.Resampling.BILINEAR)
+    return scaled
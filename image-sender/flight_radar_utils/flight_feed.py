@@ -0,0 +1,102 @@
+import dataclasses
+import json
+import logging
+from threading import Lock
+import requests
+from FlightRadar24.api import FlightTrackerConfig
+from FlightRadar24.core import Core
+from FlightRadar24.entities.flight import Flight
+from FlightRadar24.errors import CloudflareError, LoginError
+
+logger = logging.getLogger(__name__)
+
+def parse_feed(content: dict) -> list[Flight]:
+    # Same filtering as FlightRadar24API.get_flights, the feed mixes flights with metadata
+    return [Flight(flight_id, flight_info) for flight_id, flight_info in content.items() if flight_id[0].isnumeric()]
+
+class FlightFeedClient:
+    def get_flights(self, bounds: str) -> list[Flight]:
+        raise NotImplementedError("Subclasses must override get_flights method")
+
+    def close(self) -> None:
+        pass
+
+class FlightRadar24FeedClient(FlightFeedClient):
+    # Talks to the live feed over one pooled session so every poll reuses the same
+    # keep-alive connection instead of a fresh TCP and TLS handshake
+    def __init__(self, timeout: float = 10.0, record_path: str | None = None):
+        self.session = requests.Session()
+        self.session.headers.update(Core.json_headers)
+        self.timeout = timeout
+        self.config = FlightTrackerConfig()
+        self.login_cookie: str | None = None
+        self.record_path = record_path
+        self.record_lock = Lock()
+
+    def login(self, email: str, password: str) -> None:
+        data = {
+            "email": email,
+            "password": password,
+            "remember": "true",
+            "type": "web"
+        }
+        response = self.session.post(Core.user_login_url, data=data, timeout=self.timeout)
+        content = response.json() if "application/json" in response.headers.get("Content-Type", "") else None
+        if not response.ok or not isinstance(content, dict) or not content.get("success"):
+            raise LoginError(content["message"] if isinstance(content, dict) and "message" in content else "Your email or password is incorrect")
+        self.login_cookie = response.cookies.get("_frPl")
+        logger.info("Logged in to FlightRadar24")
+
+    def get_flights(self, bounds: str) -> list[Flight]:
+        params = dataclasses.asdict(self.config)
+        if self.login_cookie is not None:
+            params["enc"] = self.login_cookie
+        params["bounds"] = bounds
+        response = self.session.get(Core.real_time_flight_tracker_data_url, params=params, timeout=self.timeout)
+        if response.status_code == 520:
+            raise CloudflareError(message="An unexpected error has occurred. Perhaps you are making too many calls?", response=response)
+        response.raise_for_status()
+        content = response.json()
+        if self.record_path is not None:
+            self.record(content)
+        return parse_feed(content)
+
+    def record(self, content: dict) -> None:
+        # One response per line, ReplayFeedClient plays them back in order
+        with self.record_lock:
+            try:
+                with open(self.record_path, "a") as record_file:
+                    record_file.write(json.dumps(content) + "\n")
+            except OSError:
+                logger.warning(f"Failed to record flight feed response to {self.record_path}", exc_info=True)
+
+    def close(self) -> None:
+        if self.login_cookie is not None:
+            try:
+                self.session.get(Core.user_logout_url, timeout=self.timeout)
+            except requests.RequestException:
+                logger.warning("Failed to log out of FlightRadar24", exc_info=True)
+            self.login_cookie = None
+        self.session.close()
+
+class ReplayFeedClient(FlightFeedClient):
+    # Stand-in for the live feed that plays back responses recorded by FlightRadar24FeedClient.
+    # A line of the form {"error": "message"} raises instead, to exercise the retry path.
+    def __init__(self, path: str, loop: bool = True):
+        with open(path) as record_file:
+            self.responses = [json.loads(line) for line in record_file if line.strip()]
+        if len(self.responses) == 0:
+            raise ValueError(f"No recorded flight feed responses in {path}")
+        self.loop = loop
+        self.position = 0
+        logger.info(f"Replaying {len(self.responses)} recorded flight feed responses from {path}")
+
+    def get_flights(self, bounds: str) -> list[Flight]:
+        content = self.responses[self.position]
+        if self.position + 1 < len(self.responses):
+            self.position += 1
+        elif self.loop:
+            self.position = 0
+        if set(content.keys()) == {"error"}:
+            raise requests.ConnectionError(content["error"])
+        return parse_feed(content)
@@ -0,0 +1,81 @@
+from collections import deque
+import logging
+import math
+import random
+import time
+import numpy as np
+from flight_radar_utils.flight_data_source import FlightDataSource
+from flight_radar_utils.flight_table import FlightTable
+from flight_radar_utils.geo import MILES_PER_HOUR_PER_KNOT, bearing_degrees
+
+logger = logging.getLogger(__name__)
+
+class AdaptivePoller:
+    # Picks the delay before the next poll: short while something is close or about to be,
+    # long while the box is empty, and exponential backoff with jitter after failures
+    def __init__(self, data_source: FlightDataSource, min_interval: float = 1.0, interval: float = 3.0, idle_interval: float = 15.0,
+                 near_distance: float = 5.0, lookahead: float = 60.0, max_backoff: float = 120.0):
+        self.data_source = data_source
+        self.min_interval = min_interval
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.near_distance = near_distance  # Miles
+        self.lookahead = lookahead  # Seconds an approaching flight counts as close already
+        self.max_backoff = max_backoff
+        self.delay = interval
+
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latencies: deque[float] = deque(maxlen=100)
+        self.max_latency = 0.0
+
+    def poll(self) -> FlightTable | None:
+        start_time = time.monotonic()
+        self.requests += 1
+        try:
+            flight_data = self.data_source.get_flight_data()
+        except Exception:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.delay = self.get_backoff()
+            # The traceback only for the first failure of a streak, the rest repeat it
+            logger.warning(f"Flight data request failed ({self.consecutive_failures} in a row), retrying in {self.delay:.1f}s", exc_info=self.consecutive_failures == 1)
+            return None
+        latency = time.monotonic() - start_time
+        self.latencies.append(latency)
+        self.max_latency = max(self.max_latency, latency)
+        self.consecutive_failures = 0
+        self.delay = self.get_interval(flight_data)
+        logger.debug(f"Got {len(flight_data)} flights in {latency * 1000:.0f}ms, next poll in {self.delay:.1f}s")
+        return flight_data
+
+    def get_backoff(self) -> float:
+        # Equal jitter: at least half the exponential delay, so retries never bunch up at zero
+        backoff = min(self.max_backoff, self.interval * 2 ** (self.consecutive_failures - 1))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def get_interval(self, flight_data: FlightTable) -> float:
+        if len(flight_data) == 0:
+            return self.idle_interval
+
+        home = self.data_source.home
+        bearing_to_home = bearing_degrees(flight_data.latitude, flight_data.longitude, home.latitude, home.longitude)
+        closing_speed = flight_data.speed * MILES_PER_HOUR_PER_KNOT * np.cos(np.radians(flight_data.heading - bearing_to_home))
+        # Where each flight will be after the lookahead if it keeps closing in at this rate
+        projected_distance = flight_data.distance - np.maximum(closing_speed, 0) * self.lookahead / 3600
+        if np.any(projected_distance < self.near_distance):
+            return self.min_interval
+        return self.interval
+
+    def get_stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "FlightRequests": self.requests,
+            "FlightRequestFailures": self.failures,
+            "FlightConsecutiveFailures": self.consecutive_failures,
+            "FlightMeanLatencyMs": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            "FlightP95LatencyMs": 1000 * latencies[math.ceil(0.95 * len(latencies)) - 1] if latencies else 0.0,
+            "FlightMaxLatencyMs": 1000 * self.max_latency,
+            "FlightPollInterval": self.delay
+        }
@@ -0,0 +1,64 @@
+from typing import Iterator, NamedTuple, Sequence, Tuple
+import numpy as np
+from flight_radar_utils.geo import MILES_PER_HOUR_PER_KNOT, destination_point
+
+class Flight(NamedTuple):
+    aircraft: str
+    origin: str
+    flight_number: str
+    direction: str
+    speed: int
+    distance: float
+
+class FlightTable:
+    # One array per column so distances and ordering work on every flight at once
+    def __init__(self, aircraft: Sequence[str], origin: Sequence[str], flight_number: Sequence[str], direction: Sequence[str],
+                 latitude: np.ndarray, longitude: np.ndarray, speed: np.ndarray, heading: np.ndarray, timestamp: np.ndarray, distance: np.ndarray):
+        self.aircraft = np.asarray(aircraft, dtype=object)
+        self.origin = np.asarray(origin, dtype=object)
+        self.flight_number = np.asarray(flight_number, dtype=object)
+        self.direction = np.asarray(direction, dtype=object)
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.speed = np.asarray(speed, dtype=np.int32)
+        self.heading = np.asarray(heading, dtype=np.int32)
+        self.timestamp = np.asarray(timestamp, dtype=np.int64)
+        self.distance = np.asarray(distance, dtype=np.float64)
+        # Tables are shared between threads as snapshots, nothing may change them in place
+        for column in vars(self).values():
+            column.flags.writeable = False
+
+    @classmethod
+    def empty(cls) -> "FlightTable":
+        return cls([], [], [], [], np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+    def nearest(self, count: int | None = None, distance: np.ndarray | None = None) -> np.ndarray:
+        distance = self.distance if distance is None else distance
+        if count is None or count >= len(self):
+            return np.argsort(distance, kind="stable")
+        if count <= 0:
+            return np.empty(0, dtype=np.intp)
+        # Only the closest count flights are put in order
+        closest = np.argpartition(distance, count - 1)[:count]
+        return closest[np.argsort(distance[closest], kind="stable")]
+
+    def dead_reckon(self, now: float, max_age: float) -> Tuple[np.ndarray, np.ndarray]:
+        # Carry every fix forward along its heading at its ground speed, for at most max_age
+        # seconds so a flight that stopped reporting doesn't drift off on its own
+        age = np.clip(now - self.timestamp, 0, max_age)
+        miles = self.speed * MILES_PER_HOUR_PER_KNOT * age / 3600
+        return destination_point(self.latitude, self.longitude, self.heading, miles)
+
+    def get_flight(self, index: int, distance: np.ndarray | None = None) -> Flight:
+        distance = self.distance if distance is None else distance
+        return Flight(self.aircraft[index], self.origin[index], self.flight_number[index], self.direction[index],
+                      int(self.speed[index]), float(distance[index]))
+
+    def rows(self, indexes: Sequence[int] | np.ndarray | None = None, distance: np.ndarray | None = None) -> Iterator[Flight]:
+        if indexes is None:
+            indexes = range(len(self))
+        for index in indexes:
+            yield self.get_flight(index, distance)
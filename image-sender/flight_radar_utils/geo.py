@@ -0,0 +1,76 @@
+from enum import Enum
+from typing import Tuple
+import numpy as np
+from geopy import distance
+
+METERS_PER_MILE = 1609.344
+MILES_PER_HOUR_PER_KNOT = 1.150779
+EARTH_RADIUS_MILES = distance.EARTH_RADIUS * 1000 / METERS_PER_MILE
+WGS84_MAJOR_AXIS_MILES = distance.ELLIPSOIDS["WGS-84"][0] * 1000 / METERS_PER_MILE
+WGS84_FLATTENING = distance.ELLIPSOIDS["WGS-84"][2]
+
+class DistanceMode(Enum):
+    HAVERSINE = "haversine"  # Sphere, within about 0.5%
+    LAMBERT = "lambert"  # Ellipsoid, within meters at the ranges we track
+    GEODESIC = "geodesic"  # Exact, one geopy solve per flight
+
+class InvalidDistanceModeException(Exception):
+    pass
+
+def get_distance_mode(name: str) -> DistanceMode:
+    try:
+        return DistanceMode(name.lower())
+    except ValueError:
+        raise InvalidDistanceModeException(f"Unknown distance mode: {name}")
+
+def central_angle(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    # Haversine form, all angles in radians
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def haversine_miles(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    return EARTH_RADIUS_MILES * central_angle(lat1, lon1, np.radians(latitudes), np.radians(longitudes))
+
+def lambert_miles(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    # Lambert's formula: the great circle angle between reduced latitudes, corrected for flattening
+    f = WGS84_FLATTENING
+    beta1 = np.arctan((1 - f) * np.tan(np.radians(latitude)))
+    beta2 = np.arctan((1 - f) * np.tan(np.radians(latitudes)))
+    sigma = central_angle(beta1, np.radians(longitude), beta2, np.radians(longitudes))
+
+    p = (beta1 + beta2) / 2
+    q = (beta2 - beta1) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (sigma - np.sin(sigma)) * np.sin(p) ** 2 * np.cos(q) ** 2 / np.cos(sigma / 2) ** 2
+        y = (sigma + np.sin(sigma)) * np.cos(p) ** 2 * np.sin(q) ** 2 / np.sin(sigma / 2) ** 2
+        miles = WGS84_MAJOR_AXIS_MILES * (sigma - f / 2 * (x + y))
+    # Both corrections are 0/0 when the points coincide
+    return np.where(sigma > 0, miles, 0.0)
+
+def geodesic_miles(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    home = (latitude, longitude)
+    return np.array([distance.geodesic(home, (lat, lon)).miles for lat, lon in zip(latitudes, longitudes)], dtype=np.float64)
+
+def distance_miles(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray, mode: DistanceMode = DistanceMode.LAMBERT) -> np.ndarray:
+    if mode == DistanceMode.HAVERSINE:
+        return haversine_miles(latitude, longitude, latitudes, longitudes)
+    elif mode == DistanceMode.GEODESIC:
+        return geodesic_miles(latitude, longitude, latitudes, longitudes)
+    return lambert_miles(latitude, longitude, latitudes, longitudes)
+
+def bearing_degrees(latitudes: np.ndarray, longitudes: np.ndarray, latitude: float, longitude: float) -> np.ndarray:
+    # Initial great circle bearing from each point to (latitude, longitude), clockwise from north
+    lat1, lat2 = np.radians(latitudes), np.radians(latitude)
+    delta_lon = np.radians(longitude) - np.radians(longitudes)
+    x = np.sin(delta_lon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(delta_lon)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+def destination_point(latitudes: np.ndarray, longitudes: np.ndarray, bearings: np.ndarray, miles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Where each point ends up after travelling the given miles along a great circle
+    lat1, lon1, theta = np.radians(latitudes), np.radians(longitudes), np.radians(bearings)
+    delta = miles / EARTH_RADIUS_MILES
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(delta) + np.cos(lat1) * np.sin(delta) * np.cos(theta))
+    lon2 = lon1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(lat1), np.cos(delta) - np.sin(lat1) * np.sin(lat2))
+    return np.degrees(lat2), (np.degrees(lon2) + 540) % 360 - 180
@@ -0,0 +1,62 @@
+import csv
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+# Codes the feed sends when it has nothing to report
+MISSING_CODES = ("", "N/A")
+
+class LookupTable:
+    def __init__(self, file_name: str, description: str, override_dir: str | None = None, warn_unknown: bool = True):
+        self.description = description
+        self.warn_unknown = warn_unknown
+        self.entries: dict[str, str] = {}
+        self.unknown_codes: set[str] = set()
+
+        self.load(os.path.join(DATA_DIR, file_name))
+        if override_dir is not None:
+            # Local entries extend the bundled ones and win on conflicts
+            override_path = os.path.join(override_dir, file_name)
+            if os.path.exists(override_path):
+                self.load(override_path)
+
+    def load(self, path: str) -> None:
+        with open(path, newline="", encoding="utf-8") as table_file:
+            reader = csv.reader(table_file)
+            next(reader, None)  # Header
+            count = 0
+            for row in reader:
+                if len(row) < 2 or row[0].startswith("#"):
+                    continue
+                self.entries[row[0].strip().upper()] = row[1].strip()
+                count += 1
+        logger.info(f"Loaded {count} {self.description} entries from {path}")
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, code: str, default: str | None = None) -> str | None:
+        return self.entries.get(code, default)
+
+    def lookup(self, code: str) -> str:
+        name = self.entries.get(code)
+        if name is not None:
+            return name
+        # Only warn the first time a code shows up, it will be seen again on every poll
+        if self.warn_unknown and code not in MISSING_CODES and code not in self.unknown_codes:
+            self.unknown_codes.add(code)
+            logger.warning(f"Unknown {self.description} for code: {code}")
+        return code
+
+override_dir = os.getenv("FLIGHT_LOOKUP_OVERRIDE_DIR")
+aircraft_names = LookupTable("aircraft.csv", "aircraft", override_dir)
+airport_cities = LookupTable("airports.csv", "airport", override_dir)
+airline_names = LookupTable("airlines.csv", "airline", override_dir, warn_unknown=False)
@@ -1,63 +1,215 @@
-from io import BytesIO
-from queue import Queue
 import logging
-from threading import Thread
+from threading import Lock, Thread
 import time
+from typing import Callable, NamedTuple
 from PIL.Image import Image
 
+from frame_queue import FrameQueue, OverflowPolicy
+from frame_scheduler import FrameScheduler
 from frame_sources.frame_source import FrameSource
+from display_profile import DEFAULT_PROFILE_NAME, DisplayProfile, ProfileEncoder, scale_for_profiles
+from image_utils.frame_format import FrameFormat
 from image_utils.text_display import write_debug_image
+from log_config import LogSampler
+from metrics import PipelineMetrics, SourceMetrics
+from pipeline_config import PipelineConfig
+from source_pool import SourcePool
 
 logger = logging.getLogger(__name__)
 
+class OutgoingFrames(NamedTuple):
+    # One (topic, envelope, payload) per display profile
+    frames: list[tuple[bytes, bytes, bytes]]
+    source_metrics: SourceMetrics
+    queued_time: float
+    capture_time_ns: int
+    # Frames after these may be deltas against them, losing them loses those too
+    has_deltas: bool = False
+
 class FrameMaker:
-    def __init__(self, frame_queue: Queue[bytes], frame_source: FrameSource):
+    def __init__(self, frame_queue: FrameQueue, frame_source: FrameSource, config: PipelineConfig = PipelineConfig(), metrics: PipelineMetrics | None = None,
+                 source_pool: SourcePool | None = None):
         self.frame_queue = frame_queue
         self.frame_source = frame_source
+        self.config = config
+        self.source_pool = source_pool if source_pool is not None else SourcePool(ready_timeout=config.source_ready_timeout)
+        # The next source once it is prepared, the generator cuts over to it between frames
+        self.pending_source: FrameSource | None = None
+        self.switch_lock = Lock()
+        self.switch_generation = 0
+        self.source_switches = 0
+        self.last_switch_time = 0.0
+        # Called with the source once it is the one showing, and with the source and the
+        # error when preparing it failed. From the generator and preparer threads, keep them quick.
+        self.on_source_switched: Callable[[FrameSource], None] | None = None
+        self.on_switch_failed: Callable[[FrameSource, Exception], None] | None = None
+        self.metrics = metrics if metrics is not None else PipelineMetrics(config.metrics_window)
+        self.source_metrics = self.metrics.for_source(frame_source.name)
+        profiles = config.display_profiles or (DisplayProfile(DEFAULT_PROFILE_NAME, None, config.frame_format),)
+        self.profile_encoders = [ProfileEncoder(profile, config.keyframe_interval) for profile in profiles]
+        self.has_deltas = any(profile.frame_format == FrameFormat.TILE_DELTA for profile in profiles)
         self.running = False
-        logger.info("Initialized FrameMaker")
 
-    def get_buffer_bytes_from_img(self, img: Image) -> bytes:
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        image_byte_buffer = buffer.getvalue()
-        buffer.close()
-        return image_byte_buffer
+        self.sent_frames = 0
+        self.suppressed_frames = 0
+        self.heartbeat_frames = 0
+        self.last_frame_bytes: bytes | None = None
+        self.last_send_time = 0.0
+        self.last_lost_frames = 0
+        self.scheduler = FrameScheduler(max_idle=config.heartbeat_interval)
+        self.log_sampler = LogSampler()
+
+        logger.info(f"Initialized FrameMaker with display profiles: {', '.join(f'{profile.name} ({profile.frame_format.name})' for profile in profiles)}")
+
+    def get_buffer_bytes_from_img(self, img: Image, timestamp_ns: int) -> list[tuple[bytes, bytes, bytes]]:
+        # Each profile's frame is encoded once, ZMQ fans it out to all of its subscribers
+        scaled = scale_for_profiles(img, self.profile_encoders)
+        frames = []
+        for profile_encoder in self.profile_encoders:
+            payload = profile_encoder.encode(scaled[profile_encoder.profile.size or img.size])
+            frames.append((profile_encoder.topic, profile_encoder.get_envelope(timestamp_ns), payload))
+        return frames
+
+    def force_keyframe(self) -> None:
+        for profile_encoder in self.profile_encoders:
+            profile_encoder.force_keyframe()
+
+    def is_unchanged(self, frame_bytes: bytes, now: float) -> bool:
+        # Comparing the raw pixels is far cheaper than encoding, and catches sources
+        # that redraw into the same image object every frame. Compared against the last
+        # frame queued, a frame the queue turned away is sent again.
+        if frame_bytes != self.last_frame_bytes:
+            return False
+
+        if now - self.last_send_time < self.config.heartbeat_interval:
+            self.suppressed_frames += 1
+            return True
+
+        # Heartbeat resend, make it a keyframe so a display that just joined can decode it
+        self.heartbeat_frames += 1
+        self.force_keyframe()
+        return False
+
+    def put_frame(self, image: Image, timestamp_ns: int) -> bool:
+        # Returns False if the frame was not queued
+        # Deltas only decode on top of the frame before them, so once the queue
+        # loses a frame, or is about to evict one, the next frame must be a keyframe
+        if (self.frame_queue.lost_frames != self.last_lost_frames
+                or (self.frame_queue.full() and self.frame_queue.policy == OverflowPolicy.DROP_OLDEST)):
+            self.force_keyframe()
+
+        # Frames the sender discards as stale while this one is encoded leave it without a base
+        stale_frames = self.frame_queue.stale_frames
+        #logger.debug("Getting bytes")
+        start_time = time.perf_counter()
+        frames = self.get_buffer_bytes_from_img(image, timestamp_ns)
+        self.source_metrics.stages["encode"].observe(time.perf_counter() - start_time)
+
+        queued = self.frame_queue.put(OutgoingFrames(frames, self.source_metrics, time.monotonic(), timestamp_ns, self.has_deltas),
+                                      stale_frames=stale_frames if self.has_deltas else None)
+        if not queued and self.has_deltas and self.frame_queue.stale_frames != stale_frames:
+            # Refused, it may be a delta against a flushed frame. Sent again as a keyframe instead.
+            self.force_keyframe()
+            start_time = time.perf_counter()
+            frames = self.get_buffer_bytes_from_img(image, timestamp_ns)
+            self.source_metrics.stages["encode"].observe(time.perf_counter() - start_time)
+            queued = self.frame_queue.put(OutgoingFrames(frames, self.source_metrics, time.monotonic(), timestamp_ns, self.has_deltas))
+        if not queued:
+            self.force_keyframe()
+        # Frames the queue lost since the last put, stale ones included, count against this source
+        self.source_metrics.dropped_frames += self.frame_queue.lost_frames - self.last_lost_frames
+        self.last_lost_frames = self.frame_queue.lost_frames
+        #logger.debug("Frame put in queue")
+        return queued
+
+    def get_stats(self) -> dict:
+        stats = {
+            "SentFrames": self.sent_frames,
+            "SuppressedFrames": self.suppressed_frames,
+            "HeartbeatFrames": self.heartbeat_frames,
+            "SourceSwitches": self.source_switches,
+            "LastSourceSwitchMs": 1000 * self.last_switch_time
+        }
+        stats.update(self.scheduler.get_stats())
+        stats.update(self.frame_source.get_stats())
+        stats["Profiles"] = {profile_encoder.profile.name: profile_encoder.get_stats() for profile_encoder in self.profile_encoders}
+        return stats
+
+    def begin_source(self) -> None:
+        # Start every source on a keyframe so the display never applies deltas across sources
+        for profile_encoder in self.profile_encoders:
+            profile_encoder.reset()
+        self.last_frame_bytes = None
+        self.source_metrics = self.metrics.for_source(self.frame_source.name)
+        self.scheduler.start(self.frame_source)
+
+    def cut_over(self) -> None:
+        with self.switch_lock:
+            source, self.pending_source = self.pending_source, None
+        if source is None:
+            return
+        previous_source = self.frame_source
+        self.frame_source = source
+        # It already rendered a frame while being prepared, no need to blank the panel
+        source.send_black_frame_1 = False
+        source.send_black_frame_2 = False
+        self.begin_source()
+        self.source_pool.release(previous_source)
+        self.source_switches += 1
+        logger.info(f"Cut over from {previous_source.name} to {source.name}")
+        if self.on_source_switched is not None:
+            self.on_source_switched(source)
 
     def generator(self):
-        frame_interval = 1.0 / 60  # Target frame interval for 60 FPS
         last_frame_start_time = 0
         current_frame_start_time = 0
-        with self.frame_source:
+        self.source_pool.acquire(self.frame_source)
+        try:
+            self.begin_source()
             while self.running:
+                if self.pending_source is not None:
+                    self.cut_over()
                 last_frame_start_time = current_frame_start_time
-                current_frame_start_time = time.time()
+                current_frame_start_time = time.monotonic()
+                # Wall clock, so subscribers on other hosts can measure latency against it
+                capture_time_ns = time.time_ns()
                 
                 #logger.debug("Getting frame")
+                render_start_time = time.perf_counter()
                 image = self.frame_source.get_frame()
 
                 if image == None:
                     raise Exception("Failed to get frame")
+                self.source_metrics.stages["render"].observe(time.perf_counter() - render_start_time)
+                source_capture_time_ns = self.frame_source.get_capture_time_ns()
+                if source_capture_time_ns is not None:
+                    capture_time_ns = source_capture_time_ns
+                self.source_metrics.rendered_frames += 1
 
                 #write_debug_image(image)
+
+                frame_bytes = image.tobytes() if self.config.suppress_unchanged else None
+                if frame_bytes is None or not self.is_unchanged(frame_bytes, current_frame_start_time):
+                    if self.put_frame(image, capture_time_ns):
+                        self.last_frame_bytes = frame_bytes
+                        self.sent_frames += 1
+                        self.last_send_time = current_frame_start_time
+                else:
+                    self.source_metrics.suppressed_frames += 1
                 
-                #logger.debug("Getting bytes")
-                bytes = self.get_buffer_bytes_from_img(image)
-                
-                self.frame_queue.put(bytes)
-                #logger.debug("Frame put in queue")
-                
-                frame_time = 1000 * (current_frame_start_time - last_frame_start_time)
-                logger.debug(f"Frame to frame time: {frame_time:.3f} ms")
-                
-                end_time = time.time()  # Record the end time
-                processing_time = end_time - current_frame_start_time  # Calculate processing time
-                
-                # Calculate remaining time to wait, if processing_time < frame_interval
-                time_to_wait = frame_interval - processing_time
-                if time_to_wait > 0:
-                    time.sleep(time_to_wait)                    
-            logger.info("Generator thread stopping")
+                # Once a second, per-stage timings for every frame are in the metrics
+                if self.log_sampler.ready():
+                    logger.debug("Frame to frame time: %.3f ms", 1000 * (current_frame_start_time - last_frame_start_time))
+
+                self.scheduler.wait_for_next_frame()
+        finally:
+            with self.switch_lock:
+                pending_source, self.pending_source = self.pending_source, None
+            if pending_source is not None:
+                self.source_pool.release(pending_source)
+            self.source_pool.release(self.frame_source)
+            logger.info(f"Generator thread stopping, sent {self.sent_frames} frames, suppressed {self.suppressed_frames} unchanged frames")
+            logger.info(f"Scheduler stats: {self.scheduler.get_stats()}")
 
     def start(self):
         self.generator_thread = Thread(target=self.generator)
@@ -67,12 +219,56 @@ class FrameMaker:
         logger.info("FrameMaker Started")
 
     def set_frame_source(self, source: FrameSource):
-        self.stop()
-        logger.info(f"Changing frame source to {source.name}")
-        self.frame_source = source
-        self.start()
+        # Returns right away, the current source keeps rendering while the new one is
+        # entered and gets its data, then the generator cuts over between two frames
+        cancelled_source = None
+        with self.switch_lock:
+            self.switch_generation += 1
+            generation = self.switch_generation
+            if not self.running:
+                # Entered by the generator at start()
+                self.frame_source = source
+            elif source is self.pending_source:
+                # Already prepared and waiting for the cut over
+                return
+            else:
+                # A newer request replaces a source that is prepared but not yet cut over to,
+                # preparations still running see the new generation and release their source
+                cancelled_source, self.pending_source = self.pending_source, None
+        if cancelled_source is not None:
+            self.source_pool.release(cancelled_source)
+        if source is self.frame_source:
+            if self.on_source_switched is not None:
+                self.on_source_switched(source)
+            return
+        logger.info(f"Preparing frame source {source.name}")
+        Thread(target=self.prepare_source, args=(source, generation), name=f"Prepare {source.name}", daemon=True).start()
+
+    def prepare_source(self, source: FrameSource, generation: int) -> None:
+        start_time = time.monotonic()
+        try:
+            self.source_pool.acquire(source)
+        except Exception as e:
+            logger.error(f"Failed to prepare {source.name}, staying on {self.frame_source.name}", exc_info=True)
+            self.source_pool.release(source)
+            with self.switch_lock:
+                superseded = generation != self.switch_generation
+            if not superseded and self.on_switch_failed is not None:
+                self.on_switch_failed(source, e)
+            return
+        with self.switch_lock:
+            superseded = generation != self.switch_generation or not self.running
+            if not superseded:
+                self.pending_source = source
+                self.last_switch_time = time.monotonic() - start_time
+        if superseded:
+            # Only this preparation's hold, a newer one for the same source keeps its own
+            self.source_pool.release(source)
+            return
+        self.scheduler.wake()
         
     def stop(self):
         self.running = False
+        self.scheduler.wake()
         self.generator_thread.join()
         logger.info("Stopped FrameMaker")
\ No newline at end of file
@@ -0,0 +1,108 @@
+from collections import deque
+from enum import Enum
+from queue import Empty
+from threading import Condition
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = "drop_oldest"  # Latest frame wins
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+class InvalidOverflowPolicyException(Exception):
+    pass
+
+def get_overflow_policy(name: str) -> OverflowPolicy:
+    try:
+        return OverflowPolicy(name.strip().lower())
+    except ValueError:
+        raise InvalidOverflowPolicyException(f"Unknown overflow policy: {name}")
+
+class FrameQueue:
+    def __init__(self, maxsize: int = 1, policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST, max_age: float | None = None):
+        if maxsize < 1:
+            raise ValueError("FrameQueue maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        # Frames that waited longer than max_age seconds are discarded instead of sent
+        self.max_age = max_age
+        self.items: deque[tuple[float, bytes]] = deque()
+        self.condition = Condition()
+
+        self.put_frames = 0
+        self.dropped_frames = 0
+        self.stale_frames = 0
+        logger.info(f"Created FrameQueue with size {maxsize} and {policy.value} overflow policy")
+
+    @property
+    def lost_frames(self) -> int:
+        return self.dropped_frames + self.stale_frames
+
+    def qsize(self) -> int:
+        return len(self.items)
+
+    def full(self) -> bool:
+        return len(self.items) >= self.maxsize
+
+    def put(self, item: bytes, timeout: float | None = None, stale_frames: int | None = None) -> bool:
+        # Returns False if the item was not queued. Given the stale frame count from when the
+        # item was encoded, it is also refused if frames went stale since, uncounted, as it may
+        # be a delta against one of them.
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                if self.policy == OverflowPolicy.DROP_NEWEST:
+                    self.dropped_frames += 1
+                    return False
+                elif self.policy == OverflowPolicy.BLOCK and not self.condition.wait_for(lambda: len(self.items) < self.maxsize, timeout):
+                    self.dropped_frames += 1
+                    return False
+            if stale_frames is not None and self.stale_frames != stale_frames:
+                return False
+            if len(self.items) >= self.maxsize:
+                # Drop oldest, the FrameMaker makes the frame being put a keyframe
+                _, evicted = self.items.popleft()
+                self.dropped_frames += 1
+                if has_deltas(evicted):
+                    # Frames queued behind the evicted one may be deltas against it, they go too
+                    self.dropped_frames += len(self.items)
+                    self.items.clear()
+            self.items.append((time.monotonic(), item))
+            self.put_frames += 1
+            self.condition.notify_all()
+            return True
+
+    def get(self, timeout: float | None = None) -> bytes:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                while not self.items:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Empty
+                    self.condition.wait(remaining)
+
+                put_time, item = self.items.popleft()
+                self.condition.notify_all()
+                if self.max_age is not None and time.monotonic() - put_time > self.max_age:
+                    self.stale_frames += 1
+                    if has_deltas(item):
+                        # Frames queued behind a stale one may be deltas against it, the display must
+                        # never get them. The FrameMaker sees the lost frames and sends a keyframe next.
+                        self.stale_frames += len(self.items)
+                        self.items.clear()
+                    continue
+                return item
+
+    def get_stats(self) -> dict:
+        return {
+            "QueuedFrames": self.put_frames,
+            "DroppedFrames": self.dropped_frames,
+            "StaleFrames": self.stale_frames
+        }
+
+def has_deltas(item) -> bool:
+    # Whether frames after the item may be encoded against it, queued frames can say so
+    return getattr(item, "has_deltas", False)
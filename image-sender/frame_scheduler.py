@@ -0,0 +1,66 @@
+import logging
+import time
+
+from frame_sources.frame_source import FrameSource
+
+logger = logging.getLogger(__name__)
+
+class FrameScheduler:
+    def __init__(self, max_idle: float = 1.0):
+        # Render-on-change sources still get a frame every max_idle seconds
+        self.max_idle = max_idle
+        self.frames = 0
+        self.missed_deadlines = 0
+        self.skipped_frames = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.frame_source: FrameSource | None = None
+
+    def start(self, frame_source: FrameSource) -> None:
+        self.frame_source = frame_source
+        self.interval = 1.0 / frame_source.frame_rate
+        # Deadlines are absolute points on a monotonic grid, so sleep jitter and
+        # wall clock changes never accumulate into drift
+        self.next_deadline = time.monotonic()
+        if frame_source.render_on_change:
+            logger.info(f"Scheduling {frame_source.name} on change, at most {frame_source.frame_rate} FPS")
+        else:
+            logger.info(f"Scheduling {frame_source.name} at {frame_source.frame_rate} FPS")
+
+    def wait_for_next_frame(self) -> None:
+        self.frames += 1
+        self.next_deadline += self.interval
+        now = time.monotonic()
+
+        if now < self.next_deadline:
+            time.sleep(self.next_deadline - now)
+        else:
+            lateness = now - self.next_deadline
+            self.missed_deadlines += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            if lateness > self.interval:
+                # Too far behind to catch up, skip the missed slots and realign the grid
+                skipped = int(lateness / self.interval)
+                self.skipped_frames += skipped
+                self.next_deadline += skipped * self.interval
+
+        if self.frame_source is not None and self.frame_source.render_on_change:
+            change_event = self.frame_source.change_event
+            if not change_event.wait(self.max_idle):
+                logger.debug(f"No change from {self.frame_source.name} in {self.max_idle}s, rendering anyway")
+            change_event.clear()
+            self.next_deadline = max(self.next_deadline, time.monotonic())
+
+    def wake(self) -> None:
+        if self.frame_source is not None:
+            self.frame_source.change_event.set()
+
+    def get_stats(self) -> dict:
+        return {
+            "ScheduledFrames": self.frames,
+            "MissedDeadlines": self.missed_deadlines,
+            "SkippedFrames": self.skipped_frames,
+            "MeanLatenessMs": 1000 * self.total_lateness / self.missed_deadlines if self.missed_deadlines > 0 else 0.0,
+            "MaxLatenessMs": 1000 * self.max_lateness
+        }
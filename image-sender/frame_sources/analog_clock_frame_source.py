@@ -1,29 +1,43 @@
-from datetime import datetime
-import logging
-import os
-from PIL import Image, ImageDraw, ImageFont
-from PIL.Image import Image as PILImage
-import pytz
-
-from .frame_source import FrameSource
-from image_utils.analog_clock_util import get_clock_frame
-
-logger = logging.getLogger(__name__)
-
-class AnalogClockFrameSource(FrameSource):
-    def __init__(self):
-        super().__init__("AnalogClock")
-        
-        # Store the timezone once during initialization
-        self.timezone = pytz.timezone('America/New_York')
-
-        # Specify the background color (black) and text color (green)
-        self.background_color = (0, 0, 0)  # Black
-        
-        self.image = Image.new("RGB", self.image_size, self.background_color)
-        self.draw = ImageDraw.Draw(self.image)
-
-        logger.info("Initialized Clock FrameSource")
-
-    def create_frame(self) -> PILImage:
-        return get_clock_frame()
\ No newline at end of file
+from datetime import datetime
+import logging
+import os
+from PIL.Image import Image as PILImage
+
+from .frame_source import FrameSource
+from image_utils.analog_clock_cache import AnalogClockFrameCache
+from image_utils.analog_clock_renderer import AnalogClockRenderer
+
+logger = logging.getLogger(__name__)
+
+class AnalogClockFrameSource(FrameSource):
+    def __init__(self):
+        super().__init__("AnalogClock")
+        # The second hand sweeps smoothly enough at 30 FPS
+        self.frame_rate = 30.0
+
+        # Rasterizes the dial once, only the hands are drawn per frame
+        self.renderer = AnalogClockRenderer(self.image_size)
+
+        # Optionally draw the second hand from cached sprites, ANALOG_CLOCK_CACHE_SIZE is the
+        # number of second hand positions kept, one full sweep if unset and 0 turns it off
+        cache_size = os.getenv("ANALOG_CLOCK_CACHE_SIZE")
+        if cache_size is None or int(cache_size) > 0:
+            self.frame_cache = AnalogClockFrameCache(self.renderer, int(cache_size) if cache_size is not None else None)
+        else:
+            self.frame_cache = None
+
+        logger.info("Initialized Clock FrameSource")
+
+    def create_frame(self) -> PILImage:
+        if self.frame_cache is not None:
+            return self.frame_cache.render(datetime.now())
+        return self.renderer.render(datetime.now())
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.frame_cache is not None:
+            logger.info(f"Analog clock frame cache stats: {self.frame_cache.get_stats()}")
+
+    def get_stats(self) -> dict:
+        if self.frame_cache is not None:
+            return self.frame_cache.get_stats()
+        return {}
@@ -1,9 +1,9 @@
 from datetime import datetime
 import logging
-import os
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import pytz
 
+from image_utils.font_registry import get_font
 from .frame_source import FrameSource
 
 logger = logging.getLogger(__name__)
@@ -11,9 +11,8 @@ logger = logging.getLogger(__name__)
 class ClockFrameSource(FrameSource):
     def __init__(self):
         super().__init__("Clock")
-        # Load the font once during initialization
-        font_path = os.path.join(os.getcwd(), "image-sender", "fonts", "10x20.pil")
-        self.font = ImageFont.load(font_path)
+        # Shared with every other source using the same font
+        self.font = get_font("10x20")
 
         # Store the timezone once during initialization
         self.timezone = pytz.timezone('America/New_York')
@@ -36,8 +35,11 @@ class ClockFrameSource(FrameSource):
         # Get the current time and adjust for the timezone
         current_time = datetime.now(pytz.utc)
         adjusted_time = current_time.astimezone(self.timezone)
-        text = adjusted_time.strftime("%I:%M:%S.%f")[:-3]
+        text = adjusted_time.strftime("%I:%M:%S.")
+        milliseconds = adjusted_time.strftime("%f")[:3]
 
-        # Render the text on the image
-        self.draw.text(self.text_position, text, font=self.font, fill=self.text_color)
+        # Render the text on the image, in two parts so both come from the line cache
+        self.font.draw_text(self.draw, self.text_position, text, self.text_color)
+        milliseconds_position = (self.text_position[0] + self.font.get_width(text), self.text_position[1])
+        self.font.draw_text(self.draw, milliseconds_position, milliseconds, self.text_color)
         return self.image
\ No newline at end of file
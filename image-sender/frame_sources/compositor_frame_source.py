@@ -0,0 +1,252 @@
+import logging
+import os
+import time
+from typing import NamedTuple, Tuple
+import numpy as np
+from PIL import Image
+from PIL.Image import Image as PILImage
+
+from frame_sources.frame_source import FrameSource
+from source_registry import SourceRegistry
+
+logger = logging.getLogger(__name__)
+
+# A translucent digital readout over the bottom of the analog clock
+DEFAULT_LAYERS = "Analog Clock:128x128+0+0,Clock:128x20+0+108:z=1:opacity=0.8:fps=10:crop=128x20+0+0"
+
+class InvalidLayerException(Exception):
+    pass
+
+class Layer(NamedTuple):
+    source_name: str
+    # x, y, width and height on the panel, the source's frame is scaled to fit
+    region: Tuple[int, int, int, int]
+    # Higher layers are blended over lower ones
+    z: int = 0
+    opacity: float = 1.0
+    # None renders the layer at its source's own frame rate
+    frame_rate: float | None = None
+    # x, y, width and height taken out of the source's frame before scaling, None takes all of it
+    crop: Tuple[int, int, int, int] | None = None
+
+def parse_geometry(geometry: str) -> Tuple[int, int, int, int]:
+    # WIDTHxHEIGHT+X+Y
+    size, x, y = geometry.split("+")
+    width, height = (int(dimension) for dimension in size.lower().split("x"))
+    return (int(x), int(y), width, height)
+
+def parse_layers(spec: str) -> Tuple[Layer, ...]:
+    # name:WIDTHxHEIGHT+X+Y followed by optional z=, opacity=, fps= and crop= fields, entries
+    # separated by commas, e.g. "Plane Tracker:128x128+0+0,Clock:128x20+0+108:z=1:opacity=0.8:crop=128x20+0+0"
+    layers = []
+    for index, entry in enumerate(spec.split(",")):
+        if entry.strip() == "":
+            continue
+        try:
+            name, geometry, *options = (part.strip() for part in entry.split(":"))
+            fields = dict(option.split("=", 1) for option in options)
+            layer = Layer(
+                source_name=name,
+                region=parse_geometry(geometry),
+                z=int(fields.pop("z", index)),
+                opacity=float(fields.pop("opacity", 1.0)),
+                frame_rate=float(fields["fps"]) if "fps" in fields else None,
+                crop=parse_geometry(fields["crop"]) if "crop" in fields else None
+            )
+            fields.pop("fps", None)
+            fields.pop("crop", None)
+        except ValueError:
+            raise InvalidLayerException(f"Invalid layer: {entry}")
+        if len(fields) > 0:
+            raise InvalidLayerException(f"Unknown layer options {', '.join(fields)}: {entry}")
+        if not 0.0 <= layer.opacity <= 1.0 or (layer.frame_rate is not None and layer.frame_rate <= 0):
+            raise InvalidLayerException(f"Layer opacity must be between 0 and 1 and its frame rate above 0: {entry}")
+        layers.append(layer)
+
+    if len(layers) == 0:
+        raise InvalidLayerException(f"The compositor needs at least one layer: {spec}")
+    return tuple(layers)
+
+class LayerState:
+    def __init__(self, layer: Layer, source: FrameSource):
+        self.layer = layer
+        self.source = source
+        x, y, width, height = layer.region
+        self.bounds = (x, y, x + width, y + height)
+        self.interval = 1.0 / (layer.frame_rate or source.frame_rate)
+        self.opaque = layer.opacity >= 1.0
+        self.reset()
+
+    def reset(self) -> None:
+        # Premultiplied by the opacity, so blending is one multiply and one add per pixel
+        self.pixels = np.zeros((self.layer.region[3], self.layer.region[2], 3), dtype=np.float32)
+        self.last_frame_bytes: bytes | None = None
+        self.next_render_time = 0.0
+        self.renders = 0
+        self.changes = 0
+
+    def update(self, image: PILImage) -> bool:
+        # Returns whether the layer looks different, unchanged layers are not scaled or re-blended
+        self.renders += 1
+        frame_bytes = image.tobytes()
+        if frame_bytes == self.last_frame_bytes:
+            return False
+        self.last_frame_bytes = frame_bytes
+
+        if self.layer.crop is not None:
+            x, y, width, height = self.layer.crop
+            image = image.crop((x, y, x + width, y + height))
+        size = (self.layer.region[2], self.layer.region[3])
+        if image.size != size:
+            image = image.resize(size, Image.BILINEAR)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        np.multiply(np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(self.pixels.shape), self.layer.opacity, out=self.pixels)
+        self.changes += 1
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "Renders": self.renders,
+            "Changes": self.changes
+        }
+
+class CompositorFrameSource(FrameSource):
+    # Stacks other frame sources as layers. Each layer renders at its own rate and is kept
+    # blended into the panel, only the regions of layers that changed are blended again.
+    def __init__(self, layers: Tuple[Layer, ...] | None = None, sources: SourceRegistry | None = None):
+        super().__init__("Compositor")
+        if layers is None:
+            layers = parse_layers(os.getenv("COMPOSITOR_LAYERS", DEFAULT_LAYERS))
+        # Its own instances of the layer sources, entering and exiting them never
+        # interferes with the same source being shown on its own
+        self.sources = sources if sources is not None else SourceRegistry()
+
+        names = [layer.source_name for layer in layers]
+        if len(set(names)) != len(names):
+            raise InvalidLayerException(f"A source can only be used by one layer: {', '.join(names)}")
+        width, height = self.image_size
+        for layer in layers:
+            if layer.source_name not in self.sources or self.sources.specs[layer.source_name].class_name == type(self).__name__:
+                raise InvalidLayerException(f"Invalid layer source: {layer.source_name}")
+            x, y, layer_width, layer_height = layer.region
+            if x < 0 or y < 0 or layer_width <= 0 or layer_height <= 0 or x + layer_width > width or y + layer_height > height:
+                raise InvalidLayerException(f"Layer {layer.source_name} at {layer.region} is not on the {width}x{height} panel")
+
+        # Bottom to top, sorted is stable so equal z keeps the configured order
+        self.layers = [LayerState(layer, self.sources[layer.source_name]) for layer in sorted(layers, key=lambda layer: layer.z)]
+        # Often enough for the fastest layer, slower layers skip the frames in between
+        self.frame_rate = max(1.0 / state.interval for state in self.layers)
+
+        self.output = np.zeros((height, width, 3), dtype=np.uint8)
+        self.image = Image.fromarray(self.output)
+        self.reset_stats()
+
+        logger.info(f"Initialized Compositor FrameSource with layers: {', '.join(f'{state.layer.source_name} (z={state.layer.z})' for state in self.layers)}")
+
+    def reset_stats(self) -> None:
+        self.composited_frames = 0
+        self.unchanged_frames = 0
+        self.blended_pixels = 0
+        self.blend_time = 0.0
+
+    def create_frame(self) -> PILImage:
+        now = time.monotonic()
+        dirty_bounds = []
+        for state in self.layers:
+            if now < state.next_render_time:
+                continue
+            source = state.source
+            if source.render_on_change and state.last_frame_bytes is not None and not source.change_event.is_set():
+                continue
+            source.change_event.clear()
+            # On the layer's own grid, a late frame doesn't push back the ones after it
+            state.next_render_time = max(state.next_render_time + state.interval, now)
+            if state.update(source.get_frame()):
+                dirty_bounds.append(state.bounds)
+
+        if len(dirty_bounds) == 0:
+            # Same image object, the FrameMaker suppresses it as unchanged
+            self.unchanged_frames += 1
+            return self.image
+
+        start_time = time.perf_counter()
+        blended = []
+        for bounds in dirty_bounds:
+            # A changed layer inside another changed layer's region is already covered
+            if not any(contains(other, bounds) for other in blended):
+                self.blend(bounds)
+                blended.append(bounds)
+        self.blend_time += time.perf_counter() - start_time
+        self.composited_frames += 1
+        # A new image each time, the previous one may still be in the FrameMaker's hands
+        self.image = Image.fromarray(self.output)
+        return self.image
+
+    def blend(self, bounds: Tuple[int, int, int, int]) -> None:
+        x0, y0, x1, y1 = bounds
+        overlapping = [state for state in self.layers if intersects(state.bounds, bounds)]
+        # Nothing under the topmost opaque layer covering the whole region can show through
+        start = 0
+        for index, state in enumerate(overlapping):
+            if state.opaque and contains(state.bounds, bounds):
+                start = index
+
+        canvas = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.float32)
+        for state in overlapping[start:]:
+            lx0, ly0, lx1, ly1 = state.bounds
+            ix0, iy0, ix1, iy1 = max(x0, lx0), max(y0, ly0), min(x1, lx1), min(y1, ly1)
+            region = canvas[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0]
+            if not state.opaque:
+                region *= 1.0 - state.layer.opacity
+                region += state.pixels[iy0 - ly0:iy1 - ly0, ix0 - lx0:ix1 - lx0]
+            else:
+                region[...] = state.pixels[iy0 - ly0:iy1 - ly0, ix0 - lx0:ix1 - lx0]
+        canvas += 0.5
+        self.output[y0:y1, x0:x1] = canvas
+        self.blended_pixels += (x1 - x0) * (y1 - y0)
+
+    def __enter__(self):
+        entered = []
+        try:
+            for state in self.layers:
+                state.source.__enter__()
+                entered.append(state.source)
+                # Blanking the panel is the compositor's job, not each layer's
+                state.source.send_black_frame_1 = False
+                state.source.send_black_frame_2 = False
+                state.reset()
+        except Exception:
+            for source in reversed(entered):
+                source.__exit__(None, None, None)
+            raise
+        self.output[...] = 0
+        self.image = Image.fromarray(self.output)
+        self.reset_stats()
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        logger.info(f"Compositor stats: {self.get_stats()}")
+        for state in reversed(self.layers):
+            try:
+                state.source.__exit__(exc_type, exc_value, traceback)
+            except Exception:
+                logger.error(f"Failed to exit layer {state.layer.source_name}", exc_info=True)
+
+    def is_ready(self) -> bool:
+        return all(state.source.is_ready() for state in self.layers)
+
+    def get_stats(self) -> dict:
+        return {
+            "CompositedFrames": self.composited_frames,
+            "UnchangedFrames": self.unchanged_frames,
+            "BlendedPixels": self.blended_pixels,
+            "MeanBlendMs": 1000 * self.blend_time / self.composited_frames if self.composited_frames > 0 else 0.0,
+            "Layers": {state.layer.source_name: state.get_stats() for state in self.layers}
+        }
+
+def intersects(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def contains(outer: Tuple[int, int, int, int], inner: Tuple[int, int, int, int]) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
@@ -1,7 +1,8 @@
 import logging
-import os
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from PIL.Image import Image as PILImage
+from image_utils.font_registry import get_font
+from log_config import LogSampler
 from .frame_source import FrameSource
 
 logger = logging.getLogger(__name__)
@@ -9,9 +10,8 @@ logger = logging.getLogger(__name__)
 class CountFrameSource(FrameSource):
     def __init__(self):
         super().__init__("Count")
-        # Load the font once during initialization
-        font_path = os.path.join(os.getcwd(), "image-sender", "fonts", "10x20.pil")
-        self.font = ImageFont.load(font_path)
+        # Shared with every other source using the same font
+        self.font = get_font("10x20")
 
         # Specify the background color (black) and text color (green)
         self.background_color = (0, 0, 0)  # Black
@@ -25,6 +25,7 @@ class CountFrameSource(FrameSource):
         logger.info("Initialized Count FrameSource")
 
         self.i = 0
+        self.log_sampler = LogSampler()
 
     def create_frame(self) -> PILImage:
         # Create a new image with the specified size and color        
@@ -32,9 +33,10 @@ class CountFrameSource(FrameSource):
 
         text = f"i: {self.i}"
 
-        logger.debug(f"Sending text: i: {self.i}")
+        if self.log_sampler.ready():
+            logger.debug("Sending text: %s", text)
 
         self.i = self.i + 1
         # Render the text on the image
-        self.draw.text(self.text_position, text, font=self.font, fill=self.text_color)
+        self.font.draw_text(self.draw, self.text_position, text, self.text_color)
         return self.image
\ No newline at end of file
@@ -1,13 +1,17 @@
 import logging
 import os
-from threading import Lock, Thread
+from threading import Event, Thread
 import time
-from PIL import ImageFont, Image, ImageDraw
+from PIL import Image, ImageDraw
 from PIL.Image import Image as PILImage
 from dotenv import load_dotenv
-from geopy import distance
 from flight_radar_utils.flight_data_source import Box, FlightDataSource, Location
+from flight_radar_utils.flight_feed import FlightRadar24FeedClient, ReplayFeedClient
+from flight_radar_utils.flight_poller import AdaptivePoller
+from flight_radar_utils.flight_table import FlightTable
+from flight_radar_utils.geo import distance_miles, get_distance_mode
 from frame_sources.frame_source import FrameSource
+from image_utils.font_registry import get_font
 
 load_dotenv()
 
@@ -16,15 +20,20 @@ logger = logging.getLogger(__name__)
 class FlightDataFrameSource(FrameSource):
     def __init__(self):
         super().__init__("Flight Data")
+        # Positions are extrapolated between polls, 10 fps keeps the distances moving
+        # smoothly and frames where no digit changes are not redrawn
+        self.frame_rate = 10
 
-        font_path = os.path.join(os.getcwd(), "image-sender", "fonts", "6x13.pil")
-        self.font = ImageFont.load(font_path)
+        self.font = get_font("6x13")
         self.background_color = (0, 0, 0)  # Black
         self.arriving_color = (0, 255, 0)  # Green
         self.departing_color = (255, 255, 0) # yellow
         self.over_color = (255, 255, 255) # White
         self.image = Image.new("RGB", self.image_size, self.background_color)
         self.draw = ImageDraw.Draw(self.image)
+        # Each flight takes two text lines, anything past the bottom edge is never drawn
+        self.flight_height = 24
+        self.max_flights = -(-self.image_size[1] // self.flight_height)
 
         # Box
         x1 = os.getenv("X1")
@@ -45,50 +54,79 @@ class FlightDataFrameSource(FrameSource):
             self.home = Location(float(x), float(y))
         else:
             raise Exception("Failed to load environment variables for FlightRadar24 home location")
+
+        # Set to geodesic for exact distances, the default is well under a meter off
+        self.distance_mode = get_distance_mode(os.getenv("FLIGHT_DISTANCE_MODE", "lambert"))
+        # Seconds a fix is carried forward without a new poll, 0 shows the raw fixes
+        self.max_extrapolation = float(os.getenv("FLIGHT_MAX_EXTRAPOLATION", "30"))
         
-        self.run_updater = False
+        self.stop_updater = Event()
+        self.first_poll_done = Event()
+        self.poller: AdaptivePoller | None = None
 
         logger.info("Constructed Flight Data FrameSource")
 
     def updater(self):
-            while(self.run_updater):
-                with self.flight_data_lock:
-                    self.flight_data = self.data_source.get_flight_data()
-                time.sleep(3)
+        if self.email is not None and self.password is not None and isinstance(self.feed, FlightRadar24FeedClient):
+            try:
+                self.feed.login(self.email, self.password)
+            except Exception:
+                logger.warning("Failed to log in to FlightRadar24, continuing without credentials", exc_info=True)
+
+        while not self.stop_updater.is_set():
+            # Fetch without holding anything the render thread needs, then publish
+            # the finished table with a single reference swap
+            flight_data = self.poller.poll()
+            if flight_data is not None:
+                self.flight_data = flight_data
+                self.notify_change()
+            self.first_poll_done.set()
+            self.stop_updater.wait(self.poller.delay)
 
     def create_frame(self) -> PILImage:
-        with self.flight_data_lock:
-            self.draw.rectangle(((0, 0), self.image_size), fill=self.background_color) # Empty the image
-            cursor_y = 0
-            sorted_flights = sorted(self.flight_data, key=lambda flight: flight['Distance'])
-
-            for flight in sorted_flights:
-                if flight['Distance'] < 10:
-                    distance_format = "0.2f"
-                elif flight['Distance'] < 100:
-                    distance_format = "0.1f"
-                elif flight['Distance'] < 1000:
-                    distance_format = "0.0f"
-                else:
-                    distance_format = "0.0f"
-
-                top_line = f"{flight['Aircraft']}, {flight['Distance']:{distance_format}}"
-                bottom_line = f"{flight['Origin']} {flight['FlightNumber']}"
-
-                color = None
-                if flight["Direction"] == "In":
-                    color = self.arriving_color
-                elif flight["Direction"] == "Out":
-                    color = self.departing_color
-                elif flight["Direction"] == "Over":
-                    color = self.over_color
-
-                #text = f"{flight['Aircraft']} {flight['Speed']:3d} {flight['Distance']:{distance_format}} {flight['FlightNumber'][:6]} {flight['Direction']}"
-                self.draw.text((0, cursor_y), top_line, font=self.font, fill=color)
-                cursor_y += 12
-                self.draw.text((0, cursor_y), bottom_line, font=self.font, fill=color)
-                cursor_y += 12
-                self.draw.line([(0, cursor_y), (self.image_size[1], cursor_y)], fill=(0,0,255))
+        # Take one reference so the whole frame comes from the same snapshot
+        flight_data = self.flight_data
+        latitude, longitude = flight_data.dead_reckon(time.time(), self.max_extrapolation)
+        flight_distance = distance_miles(self.home.latitude, self.home.longitude, latitude, longitude, self.distance_mode)
+
+        lines = []
+        for flight in flight_data.rows(flight_data.nearest(self.max_flights, flight_distance), flight_distance):
+            if flight.distance < 10:
+                distance_format = "0.2f"
+            elif flight.distance < 100:
+                distance_format = "0.1f"
+            elif flight.distance < 1000:
+                distance_format = "0.0f"
+            else:
+                distance_format = "0.0f"
+
+            top_line = f"{flight.aircraft}, {flight.distance:{distance_format}}"
+            bottom_line = f"{flight.origin} {flight.flight_number}"
+
+            color = None
+            if flight.direction == "In":
+                color = self.arriving_color
+            elif flight.direction == "Out":
+                color = self.departing_color
+            elif flight.direction == "Over":
+                color = self.over_color
+
+            #text = f"{flight['Aircraft']} {flight['Speed']:3d} {flight['Distance']:{distance_format}} {flight['FlightNumber'][:6]} {flight['Direction']}"
+            lines.append((top_line, bottom_line, color))
+
+        # Most frames move nothing by a whole displayed digit
+        if lines == self.rendered_lines:
+            return self.image
+        self.rendered_lines = lines
+
+        self.draw.rectangle(((0, 0), self.image_size), fill=self.background_color) # Empty the image
+        cursor_y = 0
+        for top_line, bottom_line, color in lines:
+            self.font.draw_text(self.draw, (0, cursor_y), top_line, color)
+            cursor_y += 12
+            self.font.draw_text(self.draw, (0, cursor_y), bottom_line, color)
+            cursor_y += 12
+            self.draw.line([(0, cursor_y), (self.image_size[1], cursor_y)], fill=(0,0,255))
 
         return self.image
     
@@ -97,17 +135,35 @@ class FlightDataFrameSource(FrameSource):
         self.email = os.getenv("FR24_EMAIL")
         self.password = os.getenv("FR24_PASSWORD")
 
-        self.data_source = FlightDataSource(self.box, self.home, self.email, self.password)
-        self.flight_data = self.data_source.get_flight_data()
-        self.flight_data_lock = Lock()
+        replay_path = os.getenv("FLIGHT_FEED_REPLAY_PATH")
+        if replay_path is not None:
+            self.feed = ReplayFeedClient(replay_path)
+        else:
+            self.feed = FlightRadar24FeedClient(record_path=os.getenv("FLIGHT_FEED_RECORD_PATH"))
+
+        self.data_source = FlightDataSource(self.box, self.home, self.feed, self.distance_mode)
+        self.poller = AdaptivePoller(self.data_source)
+        # The updater makes the first request, the board starts out empty
+        self.flight_data = FlightTable.empty()
+        self.rendered_lines = None
 
-        self.run_updater = True
+        self.stop_updater.clear()
+        self.first_poll_done.clear()
         self.update_thread = Thread(target=self.updater, name="FlightRadar24 Updater")
         self.update_thread.start()
 
         logger.info("Initialized Flight Data FrameSource")
     
     def __exit__(self, exc_type, exc_value, traceback):
-        self.run_updater = False
+        self.stop_updater.set()
         self.update_thread.join()
-        logger.info("Deinitialized Flight Data FrameSource")
\ No newline at end of file
+        self.data_source.exit()
+        logger.info(f"Flight data stats: {self.poller.get_stats()}")
+        logger.info("Deinitialized Flight Data FrameSource")
+
+    def is_ready(self) -> bool:
+        # Successful or not, so a feed outage doesn't hold up the switch until the timeout
+        return self.first_poll_done.is_set()
+
+    def get_stats(self) -> dict:
+        return self.poller.get_stats() if self.poller is not None else {}
@@ -1,6 +1,7 @@
 from datetime import datetime
 import logging
 import os
+import threading
 from PIL import Image
 from PIL.Image import Image as PILImage
 logger = logging.getLogger(__name__)
@@ -12,19 +13,42 @@ class FrameSource():
         self.send_black_frame_1 = False
         self.send_black_frame_2 = False
         self.name = name
+        # Natural frame rate of the source. Render-on-change sources are only
+        # rendered after notify_change(), at most frame_rate times per second
+        self.frame_rate = 60.0
+        self.render_on_change = False
+        self.change_event = threading.Event()
+
+    def notify_change(self) -> None:
+        self.change_event.set()
 
     def get_frame(self) -> PILImage:
         if self.send_black_frame_1:
             self.send_black_frame_1 = False
+            self.notify_change()
             return Image.new('RGB', self.image_size, color=(0 ,0 ,0))
         elif self.send_black_frame_2:
             self.send_black_frame_2 = False
+            self.notify_change()
             return Image.new('RGB', self.image_size, color=(0 ,0 ,0))
         else:
             return self.create_frame()
 
     def create_frame(self) -> PILImage:
         raise NotImplementedError("Subclasses must override create_frame method")
+
+    def is_ready(self) -> bool:
+        # Whether an entered source has what it needs for a useful first frame,
+        # the switch to it waits for this
+        return True
+
+    def get_capture_time_ns(self) -> int | None:
+        # Wall clock time the content of the last created frame was captured, for sources
+        # that show something older than the render, None when it is the render time
+        return None
+
+    def get_stats(self) -> dict:
+        return {}
     
     def __enter__(self):
         self.send_black_frame_1 = True
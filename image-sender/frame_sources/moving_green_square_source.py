@@ -38,4 +38,4 @@ class MovingSquareSource(FrameSource):
         elif square_left <= 0 and self.movement_direction < 0:
             self.movement_direction *= -1  # Reverse direction to right
 
-        return imgG
\ No newline at end of file
+        return img
\ No newline at end of file
@@ -6,10 +6,12 @@ from math import ceil, floor
 import time
 import PIL.Image as PILImage
 from PIL.Image import Image
-from PIL import ImageDraw, ImageFont
+from PIL import ImageDraw
+import numpy as np
 from frame_sources.frame_source import FrameSource
-from image_utils.text_display import append_subframes, generate_subframe
-from reddit_utils.nba_comments_text_source import NBACommentsTextSource
+from image_utils.font_registry import get_font
+from image_utils.scroll_strip import ScrollStrip
+from image_utils.text_display import generate_subframe
 from reddit_utils.test_text_source import TestTextSource
 from reddit_utils.text_source import TextSource
 
@@ -18,8 +20,7 @@ logger = logging.getLogger(__name__)
 class ScrollingTextFrameSource(FrameSource):
     def __init__(self):
         super().__init__("Scrolling Text")
-        font_path = os.path.join(os.getcwd(), "image-sender", "fonts", "clR6x12.pil")
-        self.font = ImageFont.load(font_path)
+        self.font = get_font("clR6x12")
 
         # Specify the background color (black) and text color (green)
         self.text_color = (0, 255, 0)  # Green
@@ -27,77 +28,121 @@ class ScrollingTextFrameSource(FrameSource):
         self.image = PILImage.new("RGB", self.image_size, self.background_color)
         self.draw = ImageDraw.Draw(self.image)
 
-        self.run_swapper = False
+        # Set when the session the threads were started for exits, each session gets a new one
+        self.stop_event = threading.Event()
+        self.stop_event.set()
+        self.strip_capacity = 1024
+        # Rows of rendered text to keep ready beyond what fits in the strip
+        self.lookahead_rows = int(os.getenv("SCROLL_LOOKAHEAD_ROWS", "512"))
+        self.back_buffer_ready = threading.Condition()
 
         logger.info("Constructed Scrolling Text FrameSource")
         
         
         
     def create_frame(self) -> Image:
-        self.draw.rectangle(((0, 0), self.image_size), fill=self.background_color) # Empty the image
+        self.window_top = floor(self.get_scroll_offset(time.monotonic()))
+        self.strip.read_window(self.window_top, self.window)
+        self.image.frombytes(self.window)
+        return self.image
 
-        left = 0
-        upper = 0 + floor(self.window_offset)
-        right = self.image_size[0]
-        lower = self.image_size[1] + floor(self.window_offset)
-        box = (left, upper, right, lower)
-        with self.appended_lock:
-            window = self.appended.crop(box)
-        
-        frame_time = 1 / 60
-        self.window_offset += self.vertical_pixels_per_second * frame_time
+    def get_scroll_offset(self, now: float) -> float:
+        # Scroll position follows elapsed time, so late frames don't slow the text down
+        offset = self.scroll_base_offset + (now - self.scroll_base_time) * self.vertical_pixels_per_second
+        last_full_window = self.strip.written - self.image_size[1]
+        if offset > last_full_window:
+            # Out of text, hold the last window and resume from it once more arrives
+            offset = max(last_full_window, self.scroll_base_offset)
+            self.scroll_base_offset = offset
+            self.scroll_base_time = now
+        return offset
 
-        return window
-    
-    def text_swapper(self):
-            while(self.run_swapper):
-                crop_lower_edge = self.window_offset + self.image_size[1]
-                total_height = self.appended.size[1]
-                remaining_scroll = total_height - floor(crop_lower_edge)
-                if remaining_scroll < 30:
-                    logger.info(f"Remaining scroll is {remaining_scroll}")
-                    self.messages = self.text_source.get_new_messages()
-                    logger.info(f"Got new messages")
-                    new_subframes = [generate_subframe(message, self.font, (6, 12), self.image_size, self.text_color) for message in self.messages]
-                    with self.appended_lock:
-                        old_frame_rollover_height = self.image_size[1] + remaining_scroll
-                        left = 0
-                        top = total_height - old_frame_rollover_height
-                        right = self.appended.size[0]
-                        bottom = total_height
-                        old_frame_rollover = self.appended.crop((left, top, right, bottom))
-                        self.subframes = [old_frame_rollover]
-                        self.subframes.extend(new_subframes)
-                        self.appended = append_subframes(self.subframes)
-                        logger.info(f"Swapping buffer, new total length is {self.appended.size[1]}")
-                        self.window_offset = 0
-                time.sleep(0.5)
-                pass
+    def message_producer(self, stop_event: threading.Event):
+        # Fetches and renders ahead of the scroll, so a slow or blocking text source
+        # only eats into the look-ahead instead of stalling the text
+        while not stop_event.is_set():
+            with self.back_buffer_ready:
+                while not stop_event.is_set() and self.back_buffer_rows >= self.lookahead_rows:
+                    self.back_buffer_ready.wait(0.5)
+            if stop_event.is_set():
+                break
+            try:
+                messages = self.text_source.get_new_messages()
+            except Exception:
+                logger.warning("Failed to get new messages", exc_info=True)
+                time.sleep(1)
+                continue
+            for message in messages:
+                subframe = generate_subframe(message, self.font, (6, 12), self.image_size, self.text_color)
+                rows = np.asarray(subframe)[:self.strip.capacity - self.image_size[1]]
+                with self.back_buffer_ready:
+                    # Fetched before its session exited, the next session's buffer is not its to fill
+                    if stop_event.is_set():
+                        return
+                    self.back_buffer.append(rows)
+                    self.back_buffer_rows += len(rows)
+                    self.back_buffer_ready.notify_all()
+            logger.debug("Rendered %d messages, %d rows buffered", len(messages), self.back_buffer_rows)
+
+    def text_swapper(self, stop_event: threading.Event):
+        # Moves rendered messages into the strip as soon as scrolled out rows free up.
+        # Each write is published by one counter update, the render thread never waits on it.
+        while not stop_event.is_set():
+            with self.back_buffer_ready:
+                while not stop_event.is_set() and len(self.back_buffer) == 0:
+                    self.back_buffer_ready.wait(0.5)
+                if stop_event.is_set():
+                    break
+                rows = self.back_buffer[0]
+            if self.strip.free_rows(self.window_top) < len(rows):
+                time.sleep(0.1)
+                continue
+            self.strip.write(rows)
+            with self.back_buffer_ready:
+                self.back_buffer.popleft()
+                self.back_buffer_rows -= len(rows)
+                self.back_buffer_ready.notify_all()
     
+    def is_ready(self) -> bool:
+        # A full window of text to scroll in
+        return self.strip.written >= self.image_size[1]
+
     def __enter__(self):
         if not hasattr(self, 'text_source') or self.text_source is None:
+            # praw and requests take a quarter second to import, only pay for them once the source is entered
+            from reddit_utils.nba_comments_text_source import NBACommentsTextSource
             try:
                 self.text_source = NBACommentsTextSource()
             except Exception as ex:
                 logger.error("Exception occurred initializing NBACommentsTextSource", exc_info=True)
                 raise  # Re-raise the exception to handle it outside
-        
-        self.messages = self.text_source.get_new_messages()
 
-        self.subframes: list[Image] = [generate_subframe(message, self.font, (6, 12), self.image_size, self.text_color) for message in self.messages]
-        self.appended: Image = append_subframes(self.subframes)
+        # Fixed-size ring of rendered rows, new messages are written into it as the text scrolls
+        self.strip = ScrollStrip(self.image_size[0], self.strip_capacity)
+        self.window = np.zeros((self.image_size[1], self.image_size[0], 3), dtype=np.uint8)
+        self.window_top = 0
+        # Rendered messages waiting for room in the strip
+        self.back_buffer: deque[np.ndarray] = deque()
+        self.back_buffer_rows = 0
+
         self.vertical_pixels_per_second = 15
-        self.window_offset = 0
+        self.scroll_base_offset = 0.0
+        self.scroll_base_time = time.monotonic()
 
-        if not hasattr(self, 'appended_lock'):
-            self.appended_lock = threading.Lock()
-        if not hasattr(self, 'update_thread') or not self.update_thread.is_alive():
-            self.run_swapper = True
-            self.update_thread = threading.Thread(target=self.text_swapper)
-            self.update_thread.start()
+        self.stop_event = threading.Event()
+        self.producer_thread = threading.Thread(target=self.message_producer, args=(self.stop_event,), name="Scrolling Text Producer", daemon=True)
+        self.producer_thread.start()
+        self.update_thread = threading.Thread(target=self.text_swapper, args=(self.stop_event,), name="Scrolling Text Swapper")
+        self.update_thread.start()
 
         logger.info("Initialized Scrolling Text FrameSource")
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.run_swapper = False
-        self.update_thread.join()
\ No newline at end of file
+        # Under the lock, so a producer never adds to the buffer once the session is over
+        with self.back_buffer_ready:
+            self.stop_event.set()
+            self.back_buffer_ready.notify_all()
+        self.update_thread.join()
+        # The producer can be stuck waiting on the text source, it is a daemon and
+        # drops what it fetched once it returns, the next __enter__ starts its own
+        self.producer_thread.join(timeout=1)
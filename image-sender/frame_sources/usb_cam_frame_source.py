@@ -1,52 +1,152 @@
 import logging
+from threading import Event, Lock, Thread
+import time
+import numpy as np
 from PIL import Image
 import cv2
 from frame_sources.frame_source import FrameSource
+from log_config import LogSampler
+from metrics import RollingHistogram
 
 logger = logging.getLogger(__name__)
 
+# Asked of the driver so it scales on the camera instead of sending full frames to crop away,
+# cameras without the mode send their nearest one and are scaled here
+CAPTURE_SIZE = (320, 240)
+
 class USBCameraFrameSource(FrameSource):
     def __init__(self):
         super().__init__("USB Camera")
-        
+        # Rendered when the capture thread has a new frame, at most this often. Above the
+        # typical 30 FPS webcam rate so a frame never waits long on the scheduler's grid
+        self.frame_rate = 60.0
+        self.render_on_change = True
+        self.log_sampler = LogSampler()
+        self.lock = Lock()
+        self.stop_capture = Event()
+        self.first_capture_done = Event()
+        self.frame_age = RollingHistogram()
+        self.rendered_capture_time_ns: int | None = None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.captured_frames = 0
+        self.failed_captures = 0
+        self.rendered_frames = 0
+        self.repeated_frames = 0
+        self.capture_started = 0.0
+        self.capture_size = (0, 0)
+
+    def capture(self):
+        capture_buffer = None
+        crop: tuple[slice, slice] | None = None
+        while not self.stop_capture.is_set():
+            # Blocks for up to a camera frame period, which is why it runs on its own thread
+            ret, frame = self.cap.read(capture_buffer)
+            if not ret:
+                self.failed_captures += 1
+                if self.log_sampler.ready():
+                    logger.error("Failed to grab frame")
+                self.stop_capture.wait(0.1)
+                continue
+            capture_time = time.monotonic()
+            capture_time_ns = time.time_ns()
+            capture_buffer = frame
+
+            height, width = frame.shape[:2]
+            if crop is None or self.capture_size != (width, height):
+                crop = get_center_crop(width, height, self.image_size)
+                self.capture_size = (width, height)
+                logger.info(f"Capturing {width}x{height}, cropping to {crop[1].stop - crop[1].start}x{crop[0].stop - crop[0].start}")
+
+            # The crop is a view, resize and color conversion write into the preallocated back buffers
+            cv2.resize(frame[crop], self.image_size, dst=self.resized, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.back_buffer)
+
+            with self.lock:
+                self.back_buffer, self.latest_buffer = self.latest_buffer, self.back_buffer
+                self.latest_capture_time = capture_time
+                self.latest_capture_time_ns = capture_time_ns
+                self.captured_frames += 1
+            self.first_capture_done.set()
+            self.notify_change()
+
     def create_frame(self) -> Image:
-        logger.debug("Capturing frame")
-        if not self.cap.isOpened():
-            raise Exception("Camera is not initialized or opened")
-        
-        ret, frame = self.cap.read()
-        if not ret:
-            logger.error("Failed to grab frame")
-            raise Exception(f"Failed to grab frame")
-        
-        logger.debug("Grabbed frame")
-
-        # Convert the captured frame from BGR to RGB color space
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        logger.debug("Converted frame to RGB")
-
-        # Calculate new width to maintain aspect ratio
-        height, width = rgb_frame.shape[:2]
-        new_height = self.image_size[1]
-        aspect_ratio = width / height
-        new_width = int(aspect_ratio * new_height)
-
-        # Resize the frame
-        resized_frame = cv2.resize(rgb_frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-        logger.debug(f"Resized frame to {new_width}x{new_height}")
-
-        # Convert the NumPy array to a PIL Image
-        img = Image.fromarray(resized_frame)
-        logger.debug("Converted NumPy array to PIL Image")
+        if not self.first_capture_done.is_set():
+            return Image.new('RGB', self.image_size, color=(0, 0, 0))
 
+        with self.lock:
+            if self.latest_capture_time_ns == self.rendered_capture_time_ns:
+                # Heartbeat or a scheduler wake up, nothing new from the camera
+                self.repeated_frames += 1
+            # Copies out of the buffer, so the capture thread can reuse it right away
+            img = Image.fromarray(self.latest_buffer)
+            self.rendered_capture_time_ns = self.latest_capture_time_ns
+            self.frame_age.observe(time.monotonic() - self.latest_capture_time)
+        self.rendered_frames += 1
         return img
 
+    def get_capture_time_ns(self) -> int | None:
+        return self.rendered_capture_time_ns
+
     def __enter__(self):
         logger.info("Initializing Webcam")
         self.cap = cv2.VideoCapture(0)  # Ensure the webcam index is correct (0 is typically the default)
+        if not self.cap.isOpened():
+            raise Exception("Camera is not initialized or opened")
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_SIZE[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_SIZE[1])
+        # Keep the driver from queueing frames, a queued frame is an old frame
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        width, height = self.image_size
+        self.resized = np.zeros((height, width, 3), dtype=np.uint8)
+        self.back_buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        self.latest_buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        self.latest_capture_time = 0.0
+        self.latest_capture_time_ns: int | None = None
+        self.rendered_capture_time_ns: int | None = None
+        self.reset_stats()
+        self.frame_age = RollingHistogram()
+
+        self.stop_capture.clear()
+        self.first_capture_done.clear()
+        self.capture_started = time.monotonic()
+        self.capture_thread = Thread(target=self.capture, name="USB Camera Capture")
+        self.capture_thread.start()
         return super().__enter__()
 
     def __exit__(self, exc_type, exc_value, traceback):
         logger.info("Releasing Webcam")
+        self.stop_capture.set()
+        self.capture_thread.join()
+        logger.info(f"Camera stats: {self.get_stats()}")
         if self.cap.isOpened():
-            self.cap.release()
\ No newline at end of file
+            self.cap.release()
+
+    def is_ready(self) -> bool:
+        return self.first_capture_done.is_set()
+
+    def get_stats(self) -> dict:
+        elapsed = time.monotonic() - self.capture_started
+        frame_age = self.frame_age.get_stats()
+        return {
+            "CaptureSize": f"{self.capture_size[0]}x{self.capture_size[1]}",
+            "CapturedFrames": self.captured_frames,
+            "CaptureFrameRate": self.captured_frames / elapsed if self.capture_started > 0 and elapsed > 0 else 0.0,
+            "FailedCaptures": self.failed_captures,
+            # Captures replaced by a newer one before they were rendered
+            "OverwrittenFrames": max(0, self.captured_frames - (self.rendered_frames - self.repeated_frames)),
+            "RepeatedFrames": self.repeated_frames,
+            "FrameAgeP50Ms": frame_age.get("P50Ms", 0.0),
+            "FrameAgeMaxMs": frame_age.get("MaxMs", 0.0)
+        }
+
+def get_center_crop(width: int, height: int, size: tuple[int, int]) -> tuple[slice, slice]:
+    # The largest centered region with the panel's aspect ratio, so the resize never stretches
+    target_width, target_height = size
+    crop_width = min(width, height * target_width // target_height)
+    crop_height = min(height, width * target_height // target_width)
+    x = (width - crop_width) // 2
+    y = (height - crop_height) // 2
+    return (slice(y, y + crop_height), slice(x, x + crop_width))
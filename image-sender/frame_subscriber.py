@@ -0,0 +1,114 @@
+# Subscribes to a frame topic and reports end-to-end latency and dropped frames.
+# Needs the sender running with FRAME_ENVELOPE=1, latency is measured against the
+# sender's wall clock so remote hosts need synced clocks (NTP is good to a few ms).
+# Run from the image-sender directory: python frame_subscriber.py --address tcp://jumbotron:5555
+import argparse
+import math
+import time
+import zmq
+
+from image_utils.frame_format import FRAME_ENVELOPE, FrameEnvelope, InvalidFrameException, unpack_frame_envelope
+
+class FrameStats:
+    def __init__(self):
+        self.frames = 0
+        self.gaps = 0
+        self.missing_frames = 0
+        self.out_of_order = 0
+        self.restarts = 0
+        self.last_sequence: int | None = None
+        self.latencies: list[float] = []
+        self.payload_bytes = 0
+
+    def add(self, envelope: FrameEnvelope, payload_size: int, received_ns: int) -> None:
+        self.frames += 1
+        self.payload_bytes += payload_size
+        self.latencies.append((received_ns - envelope.timestamp_ns) / 1e6)
+        if self.last_sequence is not None:
+            if envelope.sequence > self.last_sequence + 1:
+                self.gaps += 1
+                self.missing_frames += envelope.sequence - self.last_sequence - 1
+            elif envelope.sequence == 1:
+                # The sender restarted and began counting again
+                self.restarts += 1
+            elif envelope.sequence <= self.last_sequence:
+                self.out_of_order += 1
+                return
+        self.last_sequence = envelope.sequence
+
+    def get_percentile(self, latencies: list[float], percentile: float) -> float:
+        return latencies[max(math.ceil(percentile / 100 * len(latencies)) - 1, 0)]
+
+    def report(self, elapsed: float) -> str:
+        if self.frames == 0:
+            return "No frames received"
+        latencies = sorted(self.latencies)
+        return (f"{self.frames} frames ({self.frames / elapsed:.1f} fps, {self.payload_bytes / self.frames / 1024:.1f} KiB mean), "
+                f"{self.gaps} gaps ({self.missing_frames} frames missing), {self.out_of_order} out of order, {self.restarts} sender restarts, "
+                f"latency ms p50 {self.get_percentile(latencies, 50):.2f} p95 {self.get_percentile(latencies, 95):.2f} "
+                f"p99 {self.get_percentile(latencies, 99):.2f} max {latencies[-1]:.2f}")
+
+def split_message(parts: list[bytes], topic: bytes) -> tuple[FrameEnvelope, bytes]:
+    if len(parts) == 3:
+        return unpack_frame_envelope(parts[1]), parts[2]
+    # Conflated senders put the envelope between the topic and the payload in one part
+    message = parts[0]
+    envelope = unpack_frame_envelope(message[len(topic):])
+    return envelope, message[len(topic) + FRAME_ENVELOPE.size:]
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame latency and gap report")
+    parser.add_argument("--address", default="tcp://localhost:5555")
+    parser.add_argument("--topic", default="/frames")
+    parser.add_argument("--duration", type=float, default=0, help="Seconds to run for, 0 runs until interrupted")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between reports")
+    parser.add_argument("--conflate", action="store_true", help="Only keep the newest frame, like a display that can't keep up")
+    args = parser.parse_args()
+
+    topic = args.topic.encode("ascii")
+    context = zmq.Context()
+    sock = context.socket(zmq.SUB)
+    if args.conflate:
+        sock.setsockopt(zmq.CONFLATE, 1)
+    sock.setsockopt(zmq.SUBSCRIBE, topic)
+    sock.setsockopt(zmq.RCVTIMEO, 1000)
+    sock.connect(args.address)
+
+    total = FrameStats()
+    interval = FrameStats()
+    start_time = interval_start = time.monotonic()
+    invalid_frames = 0
+    try:
+        while args.duration <= 0 or time.monotonic() - start_time < args.duration:
+            try:
+                parts = sock.recv_multipart()
+                received_ns = time.time_ns()
+            except zmq.Again:
+                parts = None
+            if parts is not None and parts[0][:len(topic)] == topic:
+                try:
+                    envelope, payload = split_message(parts, topic)
+                    total.add(envelope, len(payload), received_ns)
+                    interval.add(envelope, len(payload), received_ns)
+                except InvalidFrameException as e:
+                    invalid_frames += 1
+                    if invalid_frames == 1:
+                        print(f"Invalid frame, is the sender running with FRAME_ENVELOPE=1? {e}")
+
+            now = time.monotonic()
+            if now - interval_start >= args.interval:
+                print(interval.report(now - interval_start))
+                # Keep the sequence so gaps across the report boundary still count
+                last_sequence = interval.last_sequence
+                interval = FrameStats()
+                interval.last_sequence = last_sequence
+                interval_start = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Total: {total.report(time.monotonic() - start_time)}, {invalid_frames} invalid")
+        sock.close()
+        context.term()
+
+if __name__ == "__main__":
+    main()
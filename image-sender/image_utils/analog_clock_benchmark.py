@@ -0,0 +1,61 @@
+# Compares the per-frame cost of the SVG/Wand analog clock with the raster renderer.
+# Run from the image-sender directory: python -m image_utils.analog_clock_benchmark
+import argparse
+import datetime
+import time
+from types import SimpleNamespace
+
+from image_utils.analog_clock_renderer import AnalogClockRenderer
+
+def time_per_frame(render, frames: int) -> float:
+    start = datetime.datetime(2024, 1, 1, 10, 8, 0)
+    render(start)  # Warm up
+    begin = time.perf_counter()
+    for i in range(frames):
+        render(start + datetime.timedelta(seconds=i / 30))
+    return 1000 * (time.perf_counter() - begin) / frames
+
+def main():
+    parser = argparse.ArgumentParser(description="Analog clock per-frame render cost")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--output", help="Write both renderings side by side to this PNG file")
+    args = parser.parse_args()
+
+    renderer = AnalogClockRenderer()
+    raster_ms = time_per_frame(renderer.render, args.frames)
+    print(f"Raster renderer: {raster_ms:.3f} ms/frame")
+
+    try:
+        from image_utils import analog_clock_util
+    except ImportError as e:
+        print(f"SVG/Wand path unavailable: {e}")
+        return
+
+    def render_svg(now: datetime.datetime):
+        # get_clock_frame reads the current time itself, so pin it to the benchmark clock
+        class FixedDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now
+        original = analog_clock_util.datetime
+        analog_clock_util.datetime = SimpleNamespace(datetime=FixedDatetime)
+        try:
+            return analog_clock_util.get_clock_frame()
+        finally:
+            analog_clock_util.datetime = original
+
+    svg_ms = time_per_frame(render_svg, max(args.frames // 10, 1))
+    print(f"SVG/Wand path:   {svg_ms:.3f} ms/frame ({svg_ms / raster_ms:.1f}x the raster renderer)")
+
+    if args.output:
+        now = datetime.datetime(2024, 1, 1, 10, 8, 37)
+        svg_frame = render_svg(now).convert("RGB")
+        raster_frame = renderer.render(now)
+        comparison = svg_frame.resize((svg_frame.width * 2, svg_frame.height))
+        comparison.paste(svg_frame, (0, 0))
+        comparison.paste(raster_frame, (svg_frame.width, 0))
+        comparison.save(args.output)
+        print(f"Wrote comparison to {args.output}")
+
+if __name__ == "__main__":
+    main()
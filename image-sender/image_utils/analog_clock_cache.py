@@ -0,0 +1,64 @@
+import datetime
+import logging
+import math
+from typing import Tuple
+import numpy as np
+import PIL.Image
+from PIL.Image import Image as PILImage
+
+from image_utils.analog_clock_renderer import AnalogClockRenderer, HandSprite, get_hand_angles
+from image_utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+class AnalogClockFrameCache:
+    # Caches the parts of a frame that repeat. The dial with the hour and minute hands
+    # only moves a few times a minute and is kept as a base until it does. The second
+    # hand sweeps through the same positions every minute, so its anti-aliased sprite
+    # is cached per position and blended onto the base for every frame.
+    def __init__(self, renderer: AnalogClockRenderer, capacity: int | None = None, max_tip_error: float = 0.5):
+        self.renderer = renderer
+        self.image = PIL.Image.new("RGB", renderer.size)
+
+        # Quantize each hand so its tip moves at most max_tip_error pixels between
+        # cached positions, finer than that can't be seen on the panel
+        self.steps = tuple(
+            math.degrees(max_tip_error / hand.length)
+            for hand in (renderer.hour_hand, renderer.minute_hand, renderer.second_hand)
+        )
+        self.positions = tuple(round(360 / step) for step in self.steps)
+
+        # One full sweep of the second hand by default, after the first minute every frame is a hit
+        self.sprites: LRUCache[int, HandSprite] = LRUCache(capacity if capacity is not None else self.positions[2])
+        self.base = np.empty_like(renderer.dial)
+        self.base_key: Tuple[int, int] | None = None
+        self.base_renders = 0
+        self.frame = np.empty_like(renderer.dial)
+
+    def get_key(self, angles: Tuple[float, float, float]) -> Tuple[int, int, int]:
+        return tuple(round(angle / 360 * positions) % positions for angle, positions in zip(angles, self.positions))
+
+    def get_angle(self, index: int, hand: int) -> float:
+        return 360 * index / self.positions[hand]
+
+    def render(self, now: datetime.datetime) -> PILImage:
+        hour_index, minute_index, second_index = self.get_key(get_hand_angles(now))
+        if self.base_key != (hour_index, minute_index):
+            self.renderer.render_base(self.base, self.get_angle(hour_index, 0), self.get_angle(minute_index, 1))
+            self.base_key = (hour_index, minute_index)
+            self.base_renders += 1
+
+        sprite = self.sprites.get(second_index)
+        if sprite is None:
+            sprite = self.renderer.get_hand_sprite(self.renderer.second_hand, self.get_angle(second_index, 2))
+            self.sprites.put(second_index, sprite)
+
+        np.copyto(self.frame, self.base)
+        self.renderer.blend_hand(self.frame, self.renderer.second_hand, sprite)
+        self.image.frombytes(self.frame)
+        return self.image
+
+    def get_stats(self) -> dict:
+        stats = self.sprites.get_stats()
+        stats["BaseRenders"] = self.base_renders
+        return stats
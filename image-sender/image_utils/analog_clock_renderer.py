@@ -0,0 +1,142 @@
+import datetime
+import math
+from typing import NamedTuple, Tuple
+import numpy as np
+import PIL.Image
+from PIL import ImageDraw, ImageFont
+from PIL.Image import Image as PILImage
+
+# Same layout as the SVG in analog_clock_util, which is drawn on a 300x300 canvas
+SVG_SIZE = 300
+CLOCK_CENTER = (150, 150)
+CLOCK_RADIUS = 138
+
+DIAL_COLOR = (0, 128, 0)  # SVG 'green'
+NUMBER_COLOR = (128, 0, 128)  # SVG 'purple'
+SECOND_HAND_COLOR = (255, 0, 0)  # SVG 'red'
+NUMBER_FONTS = ("arialbd.ttf", "Arial Bold.ttf", "Arial_Bold.ttf", "DejaVuSans-Bold.ttf")
+
+def get_hand_angles(now: datetime.datetime) -> Tuple[float, float, float]:
+    # Degrees clockwise from 12 o'clock, computed the same way as get_clock_frame
+    hours = now.hour % 12 + now.minute / 60
+    seconds = now.second + now.microsecond / 1e6
+    minutes = now.minute + seconds / 60
+    return 360 * (hours / 12), 360 * (minutes / 60), 360 * (seconds / 60)
+
+def load_number_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    for font_name in NUMBER_FONTS:
+        try:
+            return ImageFont.truetype(font_name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+class Hand(NamedTuple):
+    length: float
+    stroke_width: float
+    color: Tuple[int, int, int]
+
+class HandSprite(NamedTuple):
+    # Anti-aliased coverage of a hand at one angle, over its bounding box on the frame
+    top: int
+    left: int
+    alpha: np.ndarray
+
+class AnalogClockRenderer:
+    def __init__(self, size: Tuple[int, int] = (128, 128), supersample: int = 4):
+        self.size = size
+        self.scale = size[0] / SVG_SIZE
+        self.center = (CLOCK_CENTER[0] * self.scale, CLOCK_CENTER[1] * self.scale)
+
+        # Hand length and stroke width in output pixels
+        self.hour_hand = Hand(0.55 * CLOCK_RADIUS * self.scale, 4 * self.scale, DIAL_COLOR)
+        self.minute_hand = Hand(0.8 * CLOCK_RADIUS * self.scale, 3 * self.scale, DIAL_COLOR)
+        self.second_hand = Hand(0.95 * CLOCK_RADIUS * self.scale, 2 * self.scale, SECOND_HAND_COLOR)
+
+        # Nothing but the hands ever moves, so the dial is rasterized once
+        self.dial = np.asarray(self.render_dial(supersample))
+        self.frame = np.empty_like(self.dial)
+        # Dial with the hour and minute hands, reused while those two stay put
+        self.base = np.empty_like(self.dial)
+        self.base_angles: Tuple[float, float] | None = None
+        self.image = PIL.Image.new("RGB", size)
+
+        # Pixel centers, sliced per hand to its bounding box
+        self.pixel_y, self.pixel_x = np.mgrid[0:size[1], 0:size[0]].astype(np.float32) + 0.5
+
+    def render_dial(self, supersample: int) -> PILImage:
+        k = self.scale * supersample
+        dial = PIL.Image.new("RGB", (self.size[0] * supersample, self.size[1] * supersample), (0, 0, 0))
+        draw = ImageDraw.Draw(dial)
+        cx, cy = CLOCK_CENTER
+
+        r_outer = CLOCK_RADIUS + 2.5
+        draw.ellipse(((cx - r_outer) * k, (cy - r_outer) * k, (cx + r_outer) * k, (cy + r_outer) * k), outline=DIAL_COLOR, width=round(5 * k))
+
+        font = load_number_font(round(42 * k))
+        for number in range(1, 13):
+            radian_angle = math.radians(360 * number / 12 - 90)
+            text_x = cx + (CLOCK_RADIUS - 32) * math.cos(radian_angle) + 2
+            text_y = cy + (CLOCK_RADIUS - 32) * math.sin(radian_angle) + 14
+            draw.text((text_x * k, text_y * k), str(number), font=font, fill=NUMBER_COLOR, anchor="ms")
+
+        for minute in range(60):
+            radian_angle = math.radians(360 * minute / 60 - 90)
+            if minute % 5 == 0:
+                inner_tick_radius, stroke_width = CLOCK_RADIUS - 15, 4
+            else:
+                inner_tick_radius, stroke_width = CLOCK_RADIUS - 10, 2
+            start = (cx + CLOCK_RADIUS * math.cos(radian_angle), cy + CLOCK_RADIUS * math.sin(radian_angle))
+            end = (cx + inner_tick_radius * math.cos(radian_angle), cy + inner_tick_radius * math.sin(radian_angle))
+            draw.line(((start[0] * k, start[1] * k), (end[0] * k, end[1] * k)), fill=DIAL_COLOR, width=round(stroke_width * k))
+
+        return dial.resize(self.size, PIL.Image.Resampling.BOX)
+
+    def get_hand_sprite(self, hand: Hand, angle: float) -> HandSprite:
+        length, stroke_width = hand.length, hand.stroke_width
+        radian_angle = math.radians(angle - 90)
+        x0, y0 = self.center
+        dx, dy = math.cos(radian_angle), math.sin(radian_angle)
+        x1, y1 = x0 + length * dx, y0 + length * dy
+
+        margin = stroke_width / 2 + 1
+        left = max(int(min(x0, x1) - margin), 0)
+        right = min(int(max(x0, x1) + margin) + 1, self.size[0])
+        top = max(int(min(y0, y1) - margin), 0)
+        bottom = min(int(max(y0, y1) + margin) + 1, self.size[1])
+
+        # Analytic anti-aliasing: coverage falls off over one pixel at the edges of the
+        # stroke, with butt ends like the SVG line
+        px = self.pixel_x[top:bottom, left:right] - x0
+        py = self.pixel_y[top:bottom, left:right] - y0
+        along = px * dx + py * dy
+        across = np.abs(px * dy - py * dx)
+        coverage = np.clip(stroke_width / 2 + 0.5 - across, 0, 1)
+        coverage *= np.clip(np.minimum(along, length - along) + 0.5, 0, 1)
+        return HandSprite(top, left, coverage[..., np.newaxis])
+
+    def blend_hand(self, frame: np.ndarray, hand: Hand, sprite: HandSprite) -> None:
+        height, width = sprite.alpha.shape[:2]
+        region = frame[sprite.top:sprite.top + height, sprite.left:sprite.left + width]
+        region[...] = region * (1 - sprite.alpha) + np.asarray(hand.color, dtype=np.float32) * sprite.alpha + 0.5
+
+    def draw_hand(self, frame: np.ndarray, hand: Hand, angle: float) -> None:
+        self.blend_hand(frame, hand, self.get_hand_sprite(hand, angle))
+
+    def render_base(self, base: np.ndarray, hour_angle: float, minute_angle: float) -> None:
+        np.copyto(base, self.dial)
+        self.draw_hand(base, self.hour_hand, hour_angle)
+        self.draw_hand(base, self.minute_hand, minute_angle)
+
+    def render(self, now: datetime.datetime) -> PILImage:
+        return self.render_angles(*get_hand_angles(now))
+
+    def render_angles(self, hour_angle: float, minute_angle: float, second_angle: float) -> PILImage:
+        if self.base_angles != (hour_angle, minute_angle):
+            self.render_base(self.base, hour_angle, minute_angle)
+            self.base_angles = (hour_angle, minute_angle)
+
+        np.copyto(self.frame, self.base)
+        self.draw_hand(self.frame, self.second_hand, second_angle)
+        self.image.frombytes(self.frame)
+        return self.image
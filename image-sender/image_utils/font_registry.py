@@ -0,0 +1,77 @@
+import logging
+import os
+from threading import Lock
+from typing import Tuple
+import numpy as np
+import PIL.Image
+from PIL import ImageDraw, ImageFont
+
+from image_utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+
+class BitmapFont:
+    # A .pil bitmap font with every latin-1 glyph pre-rasterized side by side into one
+    # atlas. Text lines are composed from atlas columns and kept in an LRU cache.
+    def __init__(self, font: ImageFont.ImageFont, line_cache_size: int = 2048):
+        self.font = font
+        glyphs = []
+        for code in range(256):
+            mask = font.getmask(chr(code))
+            glyphs.append(np.asarray(mask, dtype=np.uint8).reshape(mask.size[1], mask.size[0]))
+        self.height = max(glyph.shape[0] for glyph in glyphs)
+        # Glyphs of proportional fonts can reach into their neighbours, which the atlas columns
+        # can't reproduce. Those get an empty atlas and are drawn by ImageDraw.text.
+        self.monospace = len({glyph.shape[1] for glyph in glyphs if glyph.shape[1] > 0}) == 1
+        if not self.monospace:
+            glyphs = []
+        self.atlas = np.zeros((self.height, sum(glyph.shape[1] for glyph in glyphs)), dtype=np.uint8)
+        # Atlas columns of every glyph, glyphs missing from the font have none
+        self.columns: list[np.ndarray] = []
+        x = 0
+        for glyph in glyphs:
+            self.atlas[:glyph.shape[0], x:x + glyph.shape[1]] = glyph
+            self.columns.append(np.arange(x, x + glyph.shape[1]))
+            x += glyph.shape[1]
+        self.line_cache: LRUCache[str, PIL.Image.Image] = LRUCache(line_cache_size)
+
+    def get_width(self, text: str) -> int:
+        if not self.monospace:
+            return round(self.font.getlength(text))
+        return sum(len(self.columns[ord(char)]) for char in text if ord(char) < 256)
+
+    def render_line(self, text: str) -> PIL.Image.Image:
+        mask = self.line_cache.get(text)
+        if mask is None:
+            columns = [self.columns[ord(char)] for char in text if ord(char) < 256]
+            line = self.atlas[:, np.concatenate(columns)] if columns else np.zeros((self.height, 0), dtype=np.uint8)
+            # A 1-bit mask takes the fast path when drawn
+            mask = PIL.Image.frombuffer("L", (line.shape[1], self.height), line.tobytes(), "raw", "L", 0, 1).convert("1", dither=PIL.Image.Dither.NONE)
+            self.line_cache.put(text, mask)
+        return mask
+
+    def draw_text(self, draw: ImageDraw.ImageDraw, xy: Tuple[int, int], text: str, fill: Tuple[int, int, int]) -> None:
+        if "\n" in text or not self.monospace:
+            draw.text(xy, text, font=self.font, fill=fill)
+            return
+        # What ImageDraw.text ends in, minus rasterizing the glyphs again
+        draw.bitmap(xy, self.render_line(text), fill=fill)
+
+fonts: dict[str, BitmapFont] = {}
+fonts_lock = Lock()
+
+def get_font(name: str) -> BitmapFont:
+    # One shared copy of each font for the whole process
+    with fonts_lock:
+        font = fonts.get(name)
+        if font is None:
+            font_path = os.path.join(FONT_DIR, f"{name}.pil")
+            font = BitmapFont(ImageFont.load(font_path))
+            fonts[name] = font
+            if font.monospace:
+                logger.info(f"Loaded font {name} with a {font.atlas.shape[1]}x{font.height} glyph atlas")
+            else:
+                logger.info(f"Loaded proportional font {name}, drawn without a glyph atlas")
+        return font
@@ -0,0 +1,235 @@
+from enum import IntEnum
+from io import BytesIO
+import struct
+from typing import NamedTuple, Tuple
+import numpy as np
+import PIL.Image
+from PIL.Image import Image as PILImage
+
+# Non-PNG payloads start with a small header so consumers can tell formats apart.
+# PNG payloads are sent bare (they start with the PNG signature), which keeps
+# existing PNG-only consumers working unchanged.
+FRAME_MAGIC = b"JBF"
+FRAME_HEADER_VERSION = 1
+FRAME_HEADER = struct.Struct("<3sBBHH")  # magic, version, format, width, height
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# A tile delta follows the frame header with the tile size and changed tile count,
+# then the (x, y) tile index of every changed tile, then the RGB888 pixels of each tile.
+TILE_DELTA_HEADER = struct.Struct("<BH")  # tile size, tile count
+TILE_INDEX_DTYPE = np.dtype("<u2")
+# RGB565 pixels are little-endian 16 bit words, red in the top 5 bits
+RGB565_DTYPE = np.dtype("<u2")
+# Optional transport envelope sent ahead of the payload, so subscribers can spot dropped
+# frames and measure latency. The timestamp is wall clock nanoseconds at capture.
+FRAME_ENVELOPE_MAGIC = b"JBE"
+FRAME_ENVELOPE_VERSION = 1
+FRAME_ENVELOPE = struct.Struct("<3sBBQQ")  # magic, version, format, sequence, timestamp_ns
+
+class FrameFormat(IntEnum):
+    PNG = 0
+    RGB888 = 1
+    TILE_DELTA = 2
+    RGB565 = 3
+
+class InvalidFrameException(Exception):
+    pass
+
+def pack_frame_header(frame_format: FrameFormat, size: Tuple[int, int]) -> bytes:
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_HEADER_VERSION, frame_format, size[0], size[1])
+
+def unpack_frame_header(payload: bytes) -> Tuple[FrameFormat, Tuple[int, int]]:
+    if len(payload) < FRAME_HEADER.size:
+        raise InvalidFrameException(f"Frame payload too short for header: {len(payload)} bytes")
+    magic, version, frame_format, width, height = FRAME_HEADER.unpack_from(payload)
+    if magic != FRAME_MAGIC:
+        raise InvalidFrameException(f"Bad frame magic: {magic!r}")
+    if version != FRAME_HEADER_VERSION:
+        raise InvalidFrameException(f"Unsupported frame header version: {version}")
+    return FrameFormat(frame_format), (width, height)
+
+class FrameEnvelope(NamedTuple):
+    sequence: int
+    timestamp_ns: int
+    frame_format: FrameFormat
+
+    def pack(self) -> bytes:
+        return FRAME_ENVELOPE.pack(FRAME_ENVELOPE_MAGIC, FRAME_ENVELOPE_VERSION, self.frame_format, self.sequence, self.timestamp_ns)
+
+def unpack_frame_envelope(data: bytes) -> FrameEnvelope:
+    if len(data) < FRAME_ENVELOPE.size:
+        raise InvalidFrameException(f"Frame envelope too short: {len(data)} bytes")
+    magic, version, frame_format, sequence, timestamp_ns = FRAME_ENVELOPE.unpack_from(data)
+    if magic != FRAME_ENVELOPE_MAGIC:
+        raise InvalidFrameException(f"Bad frame envelope magic: {magic!r}")
+    if version != FRAME_ENVELOPE_VERSION:
+        raise InvalidFrameException(f"Unsupported frame envelope version: {version}")
+    return FrameEnvelope(sequence, timestamp_ns, FrameFormat(frame_format))
+
+def get_frame_format(name: str) -> FrameFormat:
+    try:
+        return FrameFormat[name.upper()]
+    except KeyError:
+        raise InvalidFrameException(f"Unknown frame format: {name}")
+
+class FrameEncoder:
+    frame_format: FrameFormat
+
+    def encode(self, img: PILImage) -> bytes:
+        raise NotImplementedError("Subclasses must override encode method")
+
+    def reset(self) -> None:
+        pass
+
+    def force_keyframe(self) -> None:
+        pass
+
+class PNGFrameEncoder(FrameEncoder):
+    frame_format = FrameFormat.PNG
+
+    def encode(self, img: PILImage) -> bytes:
+        buffer = BytesIO()
+        img.save(buffer, format='PNG')
+        image_byte_buffer = buffer.getvalue()
+        buffer.close()
+        return image_byte_buffer
+
+class RGB888FrameEncoder(FrameEncoder):
+    frame_format = FrameFormat.RGB888
+
+    def encode(self, img: PILImage) -> bytes:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        # tobytes() hands back the packed RGB rows straight from the image core
+        return pack_frame_header(self.frame_format, img.size) + img.tobytes()
+
+class RGB565FrameEncoder(FrameEncoder):
+    frame_format = FrameFormat.RGB565
+
+    def encode(self, img: PILImage) -> bytes:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        pixels = np.asarray(img).astype(RGB565_DTYPE)
+        packed = ((pixels[..., 0] >> 3) << 11) | ((pixels[..., 1] >> 2) << 5) | (pixels[..., 2] >> 3)
+        return pack_frame_header(self.frame_format, img.size) + packed.tobytes()
+
+class TileDeltaFrameEncoder(FrameEncoder):
+    frame_format = FrameFormat.TILE_DELTA
+
+    def __init__(self, tile_size: int = 8, keyframe_interval: int = 60, max_changed_ratio: float = 0.5):
+        self.tile_size = tile_size
+        self.keyframe_interval = keyframe_interval
+        self.max_changed_ratio = max_changed_ratio
+        self.keyframe_encoder = RGB888FrameEncoder()
+        self.keyframes = 0
+        self.delta_frames = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.previous: np.ndarray | None = None
+        self.frames_since_keyframe = 0
+
+    def force_keyframe(self) -> None:
+        self.previous = None
+
+    def encode(self, img: PILImage) -> bytes:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        current = np.asarray(img)
+        width, height = img.size
+        tile = self.tile_size
+
+        if (self.previous is None
+                or self.previous.shape != current.shape
+                or self.frames_since_keyframe >= self.keyframe_interval
+                or width % tile != 0 or height % tile != 0
+                or (width // tile) * (height // tile) > 0xFFFF):
+            return self.encode_keyframe(img, current)
+
+        tiles_y, tiles_x = height // tile, width // tile
+        changed_pixels = np.any(current != self.previous, axis=2)
+        changed_tiles = changed_pixels.reshape(tiles_y, tile, tiles_x, tile).any(axis=(1, 3))
+        ys, xs = np.nonzero(changed_tiles)
+        if len(ys) > self.max_changed_ratio * tiles_x * tiles_y:
+            # Past this point a keyframe is about as big and cheaper to apply
+            return self.encode_keyframe(img, current)
+
+        indices = np.empty((len(ys), 2), dtype=TILE_INDEX_DTYPE)
+        indices[:, 0] = xs
+        indices[:, 1] = ys
+        tiles = current.reshape(tiles_y, tile, tiles_x, tile, 3).swapaxes(1, 2)[ys, xs]
+
+        self.previous = current
+        self.frames_since_keyframe += 1
+        self.delta_frames += 1
+        return b"".join((
+            pack_frame_header(self.frame_format, img.size),
+            TILE_DELTA_HEADER.pack(tile, len(ys)),
+            indices.tobytes(),
+            tiles.tobytes()
+        ))
+
+    def encode_keyframe(self, img: PILImage, current: np.ndarray) -> bytes:
+        self.previous = current
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+        return self.keyframe_encoder.encode(img)
+
+def get_frame_encoder(frame_format: FrameFormat, tile_size: int = 8, keyframe_interval: int = 60) -> FrameEncoder:
+    if frame_format == FrameFormat.PNG:
+        return PNGFrameEncoder()
+    elif frame_format == FrameFormat.RGB888:
+        return RGB888FrameEncoder()
+    elif frame_format == FrameFormat.TILE_DELTA:
+        return TileDeltaFrameEncoder(tile_size, keyframe_interval)
+    elif frame_format == FrameFormat.RGB565:
+        return RGB565FrameEncoder()
+    else:
+        raise InvalidFrameException(f"No encoder for frame format: {frame_format}")
+
+class FrameDecoder:
+    def __init__(self):
+        # Last decoded frame, tile deltas are applied on top of it
+        self.frame: np.ndarray | None = None
+
+    def decode(self, payload: bytes) -> PILImage:
+        if payload[:len(PNG_SIGNATURE)] == PNG_SIGNATURE:
+            with BytesIO(payload) as png_stream:
+                img = PIL.Image.open(png_stream)
+                img.load()
+            img = img.convert("RGB")
+            self.frame = np.array(img)
+            return img
+
+        frame_format, size = unpack_frame_header(payload)
+        body = memoryview(payload)[FRAME_HEADER.size:]
+        if frame_format == FrameFormat.RGB888:
+            if len(body) != size[0] * size[1] * 3:
+                raise InvalidFrameException(f"RGB888 payload has {len(body)} bytes, expected {size[0] * size[1] * 3}")
+            self.frame = np.frombuffer(body, dtype=np.uint8).reshape(size[1], size[0], 3).copy()
+        elif frame_format == FrameFormat.TILE_DELTA:
+            self.apply_tile_delta(body, size)
+        elif frame_format == FrameFormat.RGB565:
+            if len(body) != size[0] * size[1] * 2:
+                raise InvalidFrameException(f"RGB565 payload has {len(body)} bytes, expected {size[0] * size[1] * 2}")
+            packed = np.frombuffer(body, dtype=RGB565_DTYPE).reshape(size[1], size[0])
+            red, green, blue = packed >> 11, (packed >> 5) & 0x3F, packed & 0x1F
+            # Repeat the top bits into the low ones so full intensity stays 255
+            self.frame = np.stack(((red << 3) | (red >> 2), (green << 2) | (green >> 4), (blue << 3) | (blue >> 2)), axis=-1).astype(np.uint8)
+        else:
+            raise InvalidFrameException(f"Cannot decode frame format: {frame_format.name}")
+        return PIL.Image.fromarray(self.frame)
+
+    def apply_tile_delta(self, body: memoryview, size: Tuple[int, int]) -> None:
+        width, height = size
+        if self.frame is None or self.frame.shape != (height, width, 3):
+            raise InvalidFrameException("Tile delta received without a matching keyframe")
+        tile, count = TILE_DELTA_HEADER.unpack_from(body)
+        indices_size = count * 2 * TILE_INDEX_DTYPE.itemsize
+        tiles_size = count * tile * tile * 3
+        if len(body) != TILE_DELTA_HEADER.size + indices_size + tiles_size:
+            raise InvalidFrameException(f"Tile delta payload has {len(body)} bytes for {count} tiles")
+
+        indices = np.frombuffer(body, dtype=TILE_INDEX_DTYPE, count=count * 2, offset=TILE_DELTA_HEADER.size).reshape(count, 2)
+        tiles = np.frombuffer(body, dtype=np.uint8, offset=TILE_DELTA_HEADER.size + indices_size).reshape(count, tile, tile, 3)
+        tile_view = self.frame.reshape(height // tile, tile, width // tile, tile, 3).swapaxes(1, 2)
+        tile_view[indices[:, 1], indices[:, 0]] = tiles
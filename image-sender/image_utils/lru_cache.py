@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Generic, Hashable, Iterator, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class LRUCache(Generic[K, V]):
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("LRUCache capacity must be at least 1")
+        self.capacity = capacity
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: K) -> V | None:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def items(self) -> Iterator[Tuple[K, V]]:
+        # Least recently used first, so re-inserting them in order keeps the LRU order
+        with self.lock:
+            return iter(list(self.entries.items()))
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def get_stats(self) -> dict:
+        return {
+            "Entries": len(self.entries),
+            "Hits": self.hits,
+            "Misses": self.misses,
+            "Evictions": self.evictions,
+            "HitRate": self.hit_rate
+        }
@@ -0,0 +1,29 @@
+import numpy as np
+
+class ScrollStrip:
+    # Fixed-size circular strip of pixel rows. Rows are addressed by their absolute
+    # position in the scroll, which wraps around the buffer.
+    def __init__(self, width: int, capacity: int):
+        self.width = width
+        self.capacity = capacity
+        self.buffer = np.zeros((capacity, width, 3), dtype=np.uint8)
+        # Total rows written so far, only ever advanced by the writer thread
+        self.written = 0
+
+    def free_rows(self, oldest_needed_row: int) -> int:
+        return self.capacity - (self.written - oldest_needed_row)
+
+    def write(self, rows: np.ndarray) -> None:
+        # The caller makes sure free_rows() covers the new rows
+        start = self.written % self.capacity
+        first = min(len(rows), self.capacity - start)
+        self.buffer[start:start + first] = rows[:first]
+        self.buffer[:len(rows) - first] = rows[first:]
+        # Publish the rows only after they are fully copied
+        self.written += len(rows)
+
+    def read_window(self, top: int, out: np.ndarray) -> None:
+        start = top % self.capacity
+        first = min(len(out), self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        out[first:] = self.buffer[:len(out) - first]
@@ -5,10 +5,10 @@ from typing import Tuple
 from PIL.Image import Image
 import PIL.Image as PILImage
 from PIL import ImageDraw
-from PIL.ImageFont import ImageFont
+from image_utils.font_registry import BitmapFont
 from textwrap import wrap
 
-def wrap_text(text: str, font: ImageFont, font_size: Tuple[int, int], canvas_width: int) -> list:
+def wrap_text(text: str, font: BitmapFont, font_size: Tuple[int, int], canvas_width: int) -> list:
     words = text.split()
     lines = []
     current_line = ''
@@ -52,7 +52,7 @@ def write_debug_image(image: Image):
 def split_string_every_n_chars(input_string, n):
     return [input_string[i:i+n] for i in range(0, len(input_string), n)]
 
-def generate_subframe(text: str, font: ImageFont, font_size: Tuple[int, int], canvas_size: Tuple[int, int], fill: Tuple[int, int, int]) -> Image:
+def generate_subframe(text: str, font: BitmapFont, font_size: Tuple[int, int], canvas_size: Tuple[int, int], fill: Tuple[int, int, int]) -> Image:
     # Wrap text into lines that fit the canvas width
 
     text = text.encode('latin-1', 'ignore').decode('latin-1')
@@ -70,7 +70,7 @@ def generate_subframe(text: str, font: ImageFont, font_size: Tuple[int, int], ca
 
     # Draw each line of text
     for line in lines:
-        draw.text((0, text_pos_y), line, font=font, fill=fill)
+        font.draw_text(draw, (0, text_pos_y), line, fill)
         text_pos_y += font_size[1]  # Move to the next line position
     
     return base
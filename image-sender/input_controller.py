@@ -1,15 +1,14 @@
 
 import logging
-from queue import Queue
+import time
+from typing import Callable
 from frame_maker import FrameMaker
-from frame_sources.analog_clock_frame_source import AnalogClockFrameSource
-from frame_sources.clock_frame_source import ClockFrameSource
-from frame_sources.count_frame_source import CountFrameSource
-from frame_sources.flight_data_frame_source import FlightDataFrameSource
+from frame_queue import FrameQueue
 from frame_sources.frame_source import FrameSource
-from frame_sources.moving_green_square_source import MovingSquareSource
-from frame_sources.scrolling_text_frame_source import ScrollingTextFrameSource
-from frame_sources.usb_cam_frame_source import USBCameraFrameSource
+from metrics import MetricsServer, PipelineMetrics
+from pipeline_config import PipelineConfig
+from source_pool import SourcePool
+from source_registry import SourceRegistry
 
 from sender import ZMQSender
 
@@ -20,41 +19,88 @@ class InvalidSourceException(Exception):
     pass
 
 class InputController:
-    def __init__(self, default_source: str | None = None) -> None:
+    def __init__(self, default_source: str | None = None, config: PipelineConfig = PipelineConfig()) -> None:
         logger.info("Initializing InputController")
-        self.frames: Queue[bytes] = Queue()
-        self.sender: ZMQSender = ZMQSender(self.frames)
+        start_time = time.perf_counter()
+        self.frames: FrameQueue = FrameQueue(config.frame_queue_size, config.overflow_policy, config.frame_queue_max_age)
+        self.sender: ZMQSender = ZMQSender(self.frames, config)
+        self.metrics = PipelineMetrics(config.metrics_window)
+        self.metrics_server = MetricsServer(self.metrics, config.metrics_port, config.metrics_host) if config.metrics_port > 0 else None
         
-        self.sources: dict[str, FrameSource] = {
-            "Count": CountFrameSource(),
-            "Clock": ClockFrameSource(),
-            "Camera": USBCameraFrameSource(),
-            "Square": MovingSquareSource(),
-            "ScrollingText": ScrollingTextFrameSource(),
-            "Plane Tracker": FlightDataFrameSource(),
-            "Analog Clock": AnalogClockFrameSource()
-        }
+        # Sources are imported and constructed the first time they are selected
+        self.sources = SourceRegistry()
+        if default_source is not None and default_source not in self.sources:
+            raise InvalidSourceException(f"Invalid default source: {default_source}")
+
+        for name in config.warm_sources:
+            if name not in self.sources:
+                raise InvalidSourceException(f"Invalid source to keep warm: {name}")
+        self.source_pool = SourcePool([self.sources[name] for name in config.warm_sources], config.source_ready_timeout)
 
         if default_source != None:
-            self.frame_maker: FrameMaker = FrameMaker(frame_queue=self.frames, frame_source=self.sources[default_source])
+            self.frame_maker: FrameMaker = FrameMaker(frame_queue=self.frames, frame_source=self.sources[default_source], config=config, metrics=self.metrics, source_pool=self.source_pool)
         else:
-            self.frame_maker: FrameMaker = FrameMaker(frame_queue=self.frames, frame_source=self.sources["Clock"])
+            self.frame_maker: FrameMaker = FrameMaker(frame_queue=self.frames, frame_source=self.sources["Clock"], config=config, metrics=self.metrics, source_pool=self.source_pool)
         
+        # The source showing on the panel, only changes once a switch has cut over
         self.current_source = default_source
+        # Called with the new source name after a switch, and with the requested name and the
+        # error when a switch failed, from pipeline threads
+        self.on_source_changed: Callable[[str], None] | None = None
+        self.on_source_failed: Callable[[str, str], None] | None = None
+        self.frame_maker.on_source_switched = self.source_switched
+        self.frame_maker.on_switch_failed = self.switch_failed
+        self.init_time = time.perf_counter() - start_time
+        logger.info(f"Initialized InputController in {1000 * self.init_time:.0f}ms, startup by source: {self.sources.get_startup_report()}")
 
     def start(self) -> None:
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+        self.source_pool.start()
         self.sender.start()
         self.frame_maker.start()
         
     def stop(self) -> None:
         logging.info("Stopping InputController")
         self.frame_maker.stop()
+        self.source_pool.stop()
         self.sender.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
         logging.info("InputController stopped")
 
     def set_source(self, source_name: str):
         if source_name not in self.sources:
             raise InvalidSourceException(f"Invalid source: {source_name}")
         else:
-            self.frame_maker.set_frame_source(self.sources[source_name])
-            self.current_source = source_name
\ No newline at end of file
+            try:
+                source = self.sources[source_name]
+            except Exception as e:
+                # Missing dependencies or configuration only show up once a source is first selected
+                logger.error(f"Failed to load source {source_name}", exc_info=True)
+                raise InvalidSourceException(f"Failed to load source {source_name}: {e}") from e
+            # Returns before the switch, current_source follows once it cuts over
+            self.frame_maker.set_frame_source(source)
+
+    def source_switched(self, source: FrameSource) -> None:
+        self.current_source = self.sources.get_name(source)
+        if self.on_source_changed is not None:
+            self.on_source_changed(self.current_source)
+
+    def switch_failed(self, source: FrameSource, error: Exception) -> None:
+        source_name = self.sources.get_name(source)
+        logger.warning(f"Switch to {source_name} failed, still showing {self.current_source}")
+        if self.on_source_failed is not None:
+            self.on_source_failed(source_name, str(error))
+
+    def get_metrics(self) -> dict:
+        return self.metrics.get_stats()
+
+    def get_stats(self) -> dict:
+        stats = self.frame_maker.get_stats()
+        stats.update(self.frames.get_stats())
+        stats["Startup"] = {
+            "ControllerInitMs": 1000 * self.init_time,
+            "Sources": self.sources.get_startup_report()
+        }
+        return stats
\ No newline at end of file
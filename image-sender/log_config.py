@@ -1,7 +1,9 @@
 # logconfig.py
 
+from collections import deque
 import logging
 from logging.handlers import MemoryHandler
+import os
 import queue
 import threading
 import time
@@ -51,7 +53,127 @@ class ThreadedMemoryHandler(MemoryHandler):
             self.release()
 
 
-def setup_logging(logfile='application.log', buffer_size=10000, flush_level=logging.ERROR):
+class RingBufferHandler(logging.Handler):
+    # Built for logging from the frame loop: a record is appended to a bounded deque
+    # without taking the handler lock (deque appends and pops are atomic), and a writer
+    # thread formats and writes it later. When the writer falls behind the oldest records
+    # are overwritten, the caller never waits on it.
+    def __init__(self, targets: list[logging.Handler], capacity: int = 10000, flush_level: int = logging.ERROR, flush_interval: float = 1.0):
+        super().__init__()
+        self.targets = targets
+        self.capacity = capacity
+        self.flush_level = flush_level
+        self.flush_interval = flush_interval
+        self.records: deque[logging.LogRecord] = deque(maxlen=capacity)
+        self.overwritten_records = 0
+        self.wake = threading.Event()
+        self.running = True
+        self.writer_thread = threading.Thread(target=self.writer, name="Log Writer", daemon=True)
+        self.writer_thread.start()
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if not self.filter(record):
+            return False
+        # Not exact under contention, it is only reported
+        if len(self.records) == self.capacity:
+            self.overwritten_records += 1
+        self.records.append(record)
+        if record.levelno >= self.flush_level:
+            self.wake.set()
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+    def writer(self):
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.drain()
+
+    def drain(self):
+        # Formatting happens here, so the %-style arguments of a record are only
+        # turned into a string when it is actually written
+        while True:
+            try:
+                record = self.records.popleft()
+            except IndexError:
+                break
+            for target in self.targets:
+                if record.levelno >= target.level:
+                    target.handle(record)
+        for target in self.targets:
+            target.flush()
+
+    def flush(self):
+        # Never blocks, the writer picks the buffered records up right away
+        self.wake.set()
+
+    def close(self):
+        # Blocks until everything buffered is written, only called at shutdown
+        if self.running:
+            self.running = False
+            self.wake.set()
+            self.writer_thread.join()
+            self.drain()
+            if self.overwritten_records > 0:
+                log_config_logger.warning("Log buffer overwrote %d records", self.overwritten_records)
+                self.drain()
+        super().close()
+
+class RateLimitFilter(logging.Filter):
+    # Token bucket per call site, so a message logged on every frame gets through a few
+    # times a second at most. Records above max_level always pass.
+    def __init__(self, rate: float = 2.0, burst: int = 5, max_level: int = logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self.buckets: dict[tuple[str, int], tuple[float, float]] = {}
+        self.suppressed: dict[tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        key = (record.pathname, record.lineno)
+        now = record.created
+        tokens, last_time = self.buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last_time) * self.rate)
+        if tokens < 1:
+            self.buckets[key] = (tokens, now)
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+        self.buckets[key] = (tokens - 1, now)
+        suppressed = self.suppressed.pop(key, 0)
+        if suppressed > 0 and isinstance(record.args, tuple):
+            # A message without arguments was never %-formatted, escape it before adding one
+            msg = str(record.msg) if record.args else str(record.msg).replace("%", "%%")
+            record.msg = f"{msg} (%d similar messages suppressed)"
+            record.args = record.args + (suppressed,)
+        return True
+
+class LogSampler:
+    # For messages on the frame path: decides before the record is created, which is
+    # most of what a log call costs, so the skipped frames cost one clock read
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.next_time = 0.0
+
+    def ready(self) -> bool:
+        now = time.monotonic()
+        if now < self.next_time:
+            return False
+        self.next_time = now + self.interval
+        return True
+
+def setup_logging(logfile='application.log', buffer_size=10000, flush_level=logging.ERROR, mode=None, rate_limit=None):
+    # ring suits the 60 FPS frame loop, memory is the original buffer that writes
+    # everything at once and blocks the flushing thread until it is done
+    mode = mode or os.getenv("LOG_MODE", "ring")
+    # Debug and info messages per second from each call site, 0 keeps them all. Off by default,
+    # it applies to every logger and the frame path is already sampled with LogSampler.
+    rate_limit = rate_limit if rate_limit is not None else float(os.getenv("LOG_RATE_LIMIT", "0"))
+
     formatter = ElapsedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
     # Create a file handler that logs messages to a file
@@ -63,28 +185,37 @@ def setup_logging(logfile='application.log', buffer_size=10000, flush_level=logg
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
 
-    # Create a ThreadedMemoryHandler with a buffer size and a flush level
-    memory_handler = ThreadedMemoryHandler(capacity=buffer_size, flushLevel=flush_level, target=file_handler)
-
     # Get the root logger
     root_logger = logging.getLogger()
     
     # If the root logger already has handlers, remove them
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
-    
-    # Add the ThreadedMemoryHandler to the root logger
-    root_logger.addHandler(memory_handler)
 
-    # Add the console handler to the root logger
-    root_logger.addHandler(console_handler)
+    if mode == "ring":
+        # Console output goes through the ring too, so a slow terminal can't stall a frame
+        memory_handler = RingBufferHandler([file_handler, console_handler], capacity=buffer_size, flush_level=flush_level)
+        if rate_limit > 0:
+            memory_handler.addFilter(RateLimitFilter(rate_limit))
+        root_logger.addHandler(memory_handler)
+        # Writes out whatever is still buffered
+        atexit.register(memory_handler.close)
+    else:
+        # Create a ThreadedMemoryHandler with a buffer size and a flush level
+        memory_handler = ThreadedMemoryHandler(capacity=buffer_size, flushLevel=flush_level, target=file_handler)
+
+        # Add the ThreadedMemoryHandler to the root logger
+        root_logger.addHandler(memory_handler)
+
+        # Add the console handler to the root logger
+        root_logger.addHandler(console_handler)
+
+        # Register the flush method of memory_handler to be called at exit
+        atexit.register(memory_handler.flush)
 
     # Set the logging level to the lowest level required by handlers
     root_logger.setLevel(logging.DEBUG)
 
-    # Register the flush method of memory_handler to be called at exit
-    atexit.register(memory_handler.flush)
-
     log_config_logger.debug("Logging is set up with file: %s", logfile)
 
     return memory_handler
\ No newline at end of file
@@ -7,6 +7,7 @@ from paho.mqtt.enums import CallbackAPIVersion
 
 from input_controller import InputController, InvalidSourceException
 import log_config
+from pipeline_config import PipelineConfig
 
 memory_handler = log_config.setup_logging()
 logger = logging.getLogger(__name__)
@@ -16,6 +17,8 @@ class MQTTConfigException(Exception):
     def __init__(self, *args: object) -> None:
         super().__init__(*args)
 
+pipeline_config = PipelineConfig.from_env()
+
 environment = os.getenv("ENVIRONMENT")
 if environment == "PROD":
     mqtt_broker = os.getenv("MQTT_BROKER")
@@ -37,18 +40,34 @@ if environment == "PROD":
     default_source = os.getenv("DEFAULT_SOURCE")
     if default_source is None:
         default_source = "Clock"
-    controller = InputController(default_source)
+    controller = InputController(default_source, pipeline_config)
+
+    def publish_mode(mode: str) -> None:
+        client.publish(f"{mqtt_topic}/stat", json.dumps({
+            "CurrentMode": mode
+        }))
+
+    def publish_failed_mode(target_mode: str, error: str) -> None:
+        client.publish(f"{mqtt_topic}/stat", json.dumps({
+            "CurrentMode": controller.current_source,
+            "FailedMode": target_mode,
+            "Error": error
+        }))
+
+    # The mode is published once the switch has cut over, or the failure if it never does
+    controller.on_source_changed = publish_mode
+    controller.on_source_failed = publish_failed_mode
 
     def message_handler(command: dict, topic: str | None = None):
         if command["Command"] == "ChangeMode":
             target_mode = command["TargetMode"]
             try:
                 controller.set_source(target_mode)
-                client.publish(f"{mqtt_topic}/stat", json.dumps({
-                    "CurrentMode": target_mode
-                }))
             except InvalidSourceException as e:
                 logger.warn(f"Requested source name {target_mode} is invalid")
+                publish_failed_mode(target_mode, str(e))
+        elif command["Command"] == "GetStats":
+            client.publish(f"{mqtt_topic}/stat", json.dumps(controller.get_stats()))
             
     def on_connect(client: mqtt.Client, userData, flags: dict, rc: int, properties=None):
         logger.info(f"Connected to MQTT Broker with result code: {rc}")    
@@ -78,7 +97,7 @@ if environment == "PROD":
     logger.info("Starting MQTT client loop")
     client.loop_start()
 elif environment == "DEV":
-    controller = InputController("Analog Clock")
+    controller = InputController("Analog Clock", pipeline_config)
 else:
     raise Exception("No environment set")
 
@@ -89,8 +108,15 @@ try:
         client.publish(f"{mqtt_topic}/stat", json.dumps({
             "CurrentMode": controller.current_source
         }))
+    last_metrics_time = time.monotonic()
     while(run):
         time.sleep(1)
+        if environment == "PROD" and pipeline_config.metrics_interval > 0 and time.monotonic() - last_metrics_time >= pipeline_config.metrics_interval:
+            last_metrics_time = time.monotonic()
+            client.publish(f"{mqtt_topic}/metrics", json.dumps({
+                "CurrentMode": controller.current_source,
+                "Sources": controller.get_metrics()
+            }))
 except KeyboardInterrupt:
     logger.info("Interrupt received, stopping...")
     run = False
@@ -0,0 +1,173 @@
+from bisect import bisect_left
+from collections import deque
+import logging
+import math
+from threading import Lock, Thread
+import time
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("render", "encode", "queue_wait", "send")
+# Upper bounds in seconds, a 60 FPS frame has about 16ms for everything
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.0167, 0.025, 0.05, 0.1, 0.25)
+
+class RollingHistogram:
+    # Cumulative bucket counts for scrapers, plus the most recent samples for percentiles.
+    # Written by one pipeline thread and read by others, a read can be off by the sample
+    # being recorded, which doesn't matter for monitoring.
+    def __init__(self, buckets: tuple[float, ...] = STAGE_BUCKETS, window: int = 600):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def get_stats(self) -> dict:
+        recent = sorted(self.recent)
+        if len(recent) == 0:
+            return {"Count": self.count}
+        return {
+            "Count": self.count,
+            "MeanMs": 1000 * sum(recent) / len(recent),
+            "P50Ms": 1000 * recent[math.ceil(0.5 * len(recent)) - 1],
+            "P95Ms": 1000 * recent[math.ceil(0.95 * len(recent)) - 1],
+            "P99Ms": 1000 * recent[math.ceil(0.99 * len(recent)) - 1],
+            "MaxMs": 1000 * recent[-1]
+        }
+
+class SourceMetrics:
+    def __init__(self, window: int = 600):
+        self.stages = {stage: RollingHistogram(window=window) for stage in STAGES}
+        self.rendered_frames = 0
+        self.sent_frames = 0
+        self.suppressed_frames = 0
+        self.dropped_frames = 0
+        self.sent_bytes = 0
+        self.send_times: deque[float] = deque(maxlen=window)
+        self.publish_latency = RollingHistogram(window=window)
+
+    def get_frame_rate(self) -> float:
+        # Over the recent window, so it drops to zero shortly after a source goes idle
+        send_times = list(self.send_times)
+        if len(send_times) < 2 or time.monotonic() - send_times[-1] > 5.0:
+            return 0.0
+        return (len(send_times) - 1) / (send_times[-1] - send_times[0])
+
+    def get_stats(self) -> dict:
+        return {
+            "FrameRate": self.get_frame_rate(),
+            "RenderedFrames": self.rendered_frames,
+            "SentFrames": self.sent_frames,
+            "SuppressedFrames": self.suppressed_frames,
+            "DroppedFrames": self.dropped_frames,
+            "SentBytes": self.sent_bytes,
+            "MeanBytesPerFrame": self.sent_bytes / self.sent_frames if self.sent_frames > 0 else 0.0,
+            "Stages": {stage: histogram.get_stats() for stage, histogram in self.stages.items()},
+            "PublishLatency": self.publish_latency.get_stats()
+        }
+
+class PipelineMetrics:
+    def __init__(self, window: int = 600):
+        self.window = window
+        self.sources: dict[str, SourceMetrics] = {}
+        self.lock = Lock()
+
+    def for_source(self, name: str) -> SourceMetrics:
+        # Callers keep the returned object, so the lock is only taken once per source switch
+        source_metrics = self.sources.get(name)
+        if source_metrics is None:
+            with self.lock:
+                source_metrics = self.sources.setdefault(name, SourceMetrics(self.window))
+        return source_metrics
+
+    def get_stats(self) -> dict:
+        return {name: source_metrics.get_stats() for name, source_metrics in list(self.sources.items())}
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP jumbotron_stage_seconds Time each frame spends in a pipeline stage",
+            "# TYPE jumbotron_stage_seconds histogram"
+        ]
+        sources = list(self.sources.items())
+        for name, source_metrics in sources:
+            for stage, histogram in source_metrics.stages.items():
+                lines.extend(format_histogram("jumbotron_stage_seconds", f'source="{escape_label(name)}",stage="{stage}"', histogram))
+
+        lines.append("# HELP jumbotron_publish_latency_seconds Time from capture to the frame being handed to ZMQ")
+        lines.append("# TYPE jumbotron_publish_latency_seconds histogram")
+        for name, source_metrics in sources:
+            lines.extend(format_histogram("jumbotron_publish_latency_seconds", f'source="{escape_label(name)}"', source_metrics.publish_latency))
+
+        counters = (
+            ("jumbotron_rendered_frames_total", "Frames rendered by the source", "rendered_frames"),
+            ("jumbotron_sent_frames_total", "Frames handed to ZMQ", "sent_frames"),
+            ("jumbotron_suppressed_frames_total", "Frames skipped as unchanged", "suppressed_frames"),
+            ("jumbotron_dropped_frames_total", "Frames lost in the frame queue", "dropped_frames"),
+            ("jumbotron_sent_bytes_total", "Encoded bytes handed to ZMQ", "sent_bytes")
+        )
+        for metric, help_text, attribute in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, source_metrics in sources:
+                lines.append(f'{metric}{{source="{escape_label(name)}"}} {getattr(source_metrics, attribute)}')
+
+        lines.append("# HELP jumbotron_frame_rate Frames sent per second over the recent window")
+        lines.append("# TYPE jumbotron_frame_rate gauge")
+        for name, source_metrics in sources:
+            lines.append(f'jumbotron_frame_rate{{source="{escape_label(name)}"}} {source_metrics.get_frame_rate()}')
+        return "\n".join(lines) + "\n"
+
+def format_histogram(metric: str, labels: str, histogram: RollingHistogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.buckets + (math.inf,), histogram.bucket_counts):
+        cumulative += bucket_count
+        le = "+Inf" if bound == math.inf else repr(bound)
+        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class MetricsServer:
+    # Serves the metrics in the Prometheus text format on /metrics
+    def __init__(self, metrics: PipelineMetrics, port: int, host: str = "127.0.0.1"):
+        # Imported here, http.server pulls in http.client and ssl at a cost to every startup
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"Metrics request from {self.address_string()}: {format % args}")
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server_thread = Thread(target=self.server.serve_forever, name="Metrics Server", daemon=True)
+
+    def start(self) -> None:
+        self.server_thread.start()
+        host, port = self.server.server_address[:2]
+        logger.info(f"Serving metrics on {host or '0.0.0.0'}:{port}")
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
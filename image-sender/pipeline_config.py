@@ -0,0 +1,79 @@
+import os
+from typing import NamedTuple, Tuple
+
+from display_profile import DisplayProfile, parse_display_profiles
+from frame_queue import OverflowPolicy, get_overflow_policy
+from image_utils.frame_format import FrameFormat, get_frame_format
+
+def get_bool_env(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+class PipelineConfig(NamedTuple):
+    frame_format: FrameFormat = FrameFormat.PNG
+    keyframe_interval: int = 60
+    # Skip frames that are pixel-identical to the last one sent, but resend the
+    # last frame every heartbeat_interval seconds so late-joining displays catch up
+    suppress_unchanged: bool = True
+    heartbeat_interval: float = 1.0
+    # Handoff between FrameMaker and ZMQSender, a single slot that drops the
+    # oldest frame means the newest frame always wins
+    frame_queue_size: int = 1
+    overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST
+    frame_queue_max_age: float | None = None
+    # Every frame is scaled and encoded once per profile and published on the profile's
+    # topic, None is a single profile on /frames at the source size in frame_format
+    display_profiles: Tuple[DisplayProfile, ...] | None = None
+    # Send every frame as three message parts, topic, FrameEnvelope and payload, instead of
+    # the bare topic + payload that older displays expect
+    frame_envelope: bool = False
+    # Frames ZMQ queues per subscriber before dropping, None keeps the ZMQ default of 1000.
+    # A slow display is better served by a couple of fresh frames than a second of stale ones.
+    send_hwm: int | None = None
+    # Keep only the newest frame per subscriber. ZMQ can't conflate multipart messages, so
+    # the envelope then goes in the same part, between the topic and the payload. This
+    # also conflates across topics, so it is meant for a single display profile.
+    conflate: bool = False
+    # Per-source stage timings, served in the Prometheus text format on metrics_port
+    # and published over MQTT every metrics_interval seconds. 0 turns either off.
+    metrics_port: int = 9105
+    # Only local scrapers by default, the endpoint has no authentication. "" or 0.0.0.0 serves every interface.
+    metrics_host: str = "127.0.0.1"
+    metrics_interval: float = 10.0
+    # Recent samples each stage's percentiles are taken over
+    metrics_window: int = 600
+    # Longest a source switch waits for the new source's data before cutting over anyway
+    source_ready_timeout: float = 10.0
+    # Source names entered at startup and never exited, for sources that are switched
+    # to often and slow to start, such as "Plane Tracker"
+    warm_sources: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_env(cls) -> "PipelineConfig":
+        frame_format_name = os.getenv("FRAME_FORMAT")
+        overflow_policy_name = os.getenv("FRAME_QUEUE_POLICY")
+        frame_queue_max_age = os.getenv("FRAME_QUEUE_MAX_AGE")
+        display_profiles = os.getenv("DISPLAY_PROFILES")
+        send_hwm = os.getenv("ZMQ_SNDHWM")
+        warm_sources = os.getenv("WARM_SOURCES")
+        return cls(
+            frame_format=get_frame_format(frame_format_name) if frame_format_name is not None else cls._field_defaults["frame_format"],
+            keyframe_interval=int(os.getenv("KEYFRAME_INTERVAL", cls._field_defaults["keyframe_interval"])),
+            suppress_unchanged=get_bool_env("SUPPRESS_UNCHANGED_FRAMES", cls._field_defaults["suppress_unchanged"]),
+            heartbeat_interval=float(os.getenv("HEARTBEAT_INTERVAL", cls._field_defaults["heartbeat_interval"])),
+            frame_queue_size=int(os.getenv("FRAME_QUEUE_SIZE", cls._field_defaults["frame_queue_size"])),
+            overflow_policy=get_overflow_policy(overflow_policy_name) if overflow_policy_name is not None else cls._field_defaults["overflow_policy"],
+            frame_queue_max_age=float(frame_queue_max_age) if frame_queue_max_age is not None else cls._field_defaults["frame_queue_max_age"],
+            display_profiles=parse_display_profiles(display_profiles) if display_profiles is not None else cls._field_defaults["display_profiles"],
+            frame_envelope=get_bool_env("FRAME_ENVELOPE", cls._field_defaults["frame_envelope"]),
+            send_hwm=int(send_hwm) if send_hwm is not None else cls._field_defaults["send_hwm"],
+            conflate=get_bool_env("ZMQ_CONFLATE", cls._field_defaults["conflate"]),
+            metrics_port=int(os.getenv("METRICS_PORT", cls._field_defaults["metrics_port"])),
+            metrics_host=os.getenv("METRICS_HOST", cls._field_defaults["metrics_host"]),
+            metrics_interval=float(os.getenv("METRICS_INTERVAL", cls._field_defaults["metrics_interval"])),
+            metrics_window=int(os.getenv("METRICS_WINDOW", cls._field_defaults["metrics_window"])),
+            source_ready_timeout=float(os.getenv("SOURCE_READY_TIMEOUT", cls._field_defaults["source_ready_timeout"])),
+            warm_sources=tuple(name.strip() for name in warm_sources.split(",") if name.strip() != "") if warm_sources is not None else cls._field_defaults["warm_sources"]
+        )
@@ -3,7 +3,7 @@ import logging
 import os
 import threading
 import time
-from praw.models import MoreComments
+from image_utils.lru_cache import LRUCache
 from reddit_utils.reddit_text_source import RedditTextSource
 
 logger = logging.getLogger(__name__)
@@ -17,10 +17,19 @@ class NBACommentsTextSource(RedditTextSource):
             raise Exception("SUBREDDIT environment variable not set")
 
         self.subreddit = self.reddit.subreddit(subreddit)
-        self.seen_comment_ids = set()
+        # Recently seen comment IDs, capped so a long game thread can't grow it forever
+        self.seen_comment_ids: LRUCache[str, bool] = LRUCache(int(os.getenv("REDDIT_SEEN_COMMENTS", "1000")))
+        # Base 36 ID of the newest comment seen, new comments always have larger IDs
+        self.newest_comment_id = 0
         self.comment_queue = []  # Priority queue for comments
+        self.max_queued_comments = int(os.getenv("REDDIT_MAX_QUEUED_COMMENTS", "200"))
         self.queue_lock = threading.Lock()  # Lock for synchronizing access to the queue
         self.new_comment_event = threading.Event()  # Event to signal when new comments are available
+        self.requests = 0
+        self.dropped_comments = 0
+        # Polls that ran out of listing before reaching the newest comment of the poll before,
+        # comments in between were never seen
+        self.gaps = 0
 
         if "Game Thread" in self.subreddit.sticky(number=1).title:
             self.submission = self.subreddit.sticky(number=1)
@@ -34,28 +43,63 @@ class NBACommentsTextSource(RedditTextSource):
         self.update_thread.start()
 
     def update_comments(self):
+        link_id = f"t3_{self.submission.id}"
         while True:
-            new_comments = []
-            for comment in self.subreddit.comments(limit=None):
-                # Check if the comment is from the target submission
-                if comment.submission.id == self.submission.id:
-                    # Skip any comments we've already seen
-                    if comment.id not in self.seen_comment_ids:
-                        if len(comment.body) < 100:
-                            with self.queue_lock:
-                                # Add new comments to the priority queue with negative timestamp as priority and comment ID as tiebreaker
-                                logging.info(f"Adding comment: {comment.body}")
-                                heapq.heappush(self.comment_queue, (-comment.created_utc, comment.id, comment))
-                                self.seen_comment_ids.add(comment.id)
-                            new_comments.append(comment)
+            try:
+                new_comments = self.fetch_new_comments(link_id)
+            except Exception:
+                logger.warning("Failed to fetch new comments", exc_info=True)
+                new_comments = []
 
             if new_comments:
+                with self.queue_lock:
+                    for comment in new_comments:
+                        # Add new comments to the priority queue with negative timestamp as priority and comment ID as tiebreaker
+                        logging.info(f"Adding comment: {comment.body}")
+                        heapq.heappush(self.comment_queue, (-comment.created_utc, comment.id, comment.body))
+                    if len(self.comment_queue) > self.max_queued_comments:
+                        # Keep only the newest comments, nsmallest returns a valid heap
+                        self.dropped_comments += len(self.comment_queue) - self.max_queued_comments
+                        self.comment_queue = heapq.nsmallest(self.max_queued_comments, self.comment_queue)
                 # Signal that new comments are available
                 self.new_comment_event.set()
 
-            logger.info(f"Updated comments. Queue size: {len(self.comment_queue)}")
+            logger.info(f"Updated comments. Queue size: {len(self.comment_queue)}, requests: {self.requests}, dropped: {self.dropped_comments}, gaps: {self.gaps}")
             time.sleep(10)  # Wait for 10 seconds before updating again
 
+    def fetch_new_comments(self, link_id: str) -> list:
+        new_comments = []
+        newest_comment_id = self.newest_comment_id
+        # Newest first. The listing fetches a page of 100 per request as it is iterated, so
+        # stopping at the first comment already handled by an earlier poll keeps the requests
+        # proportional to the new comments. The first poll only reads the newest page.
+        first_poll = self.newest_comment_id == 0
+        reached_watermark = False
+        comments_read = 0
+        for comment in self.subreddit.comments(limit=100 if first_poll else None):
+            comment_id = int(comment.id, 36)
+            if comment_id <= self.newest_comment_id:
+                reached_watermark = True
+                break
+            comments_read += 1
+            newest_comment_id = max(newest_comment_id, comment_id)
+            # link_id comes with the listing, comment.submission would be fetched lazily
+            if comment.link_id != link_id:
+                continue
+            # Skip any comments we've already seen
+            if self.seen_comment_ids.get(comment.id) is not None:
+                continue
+            self.seen_comment_ids.put(comment.id, True)
+            if len(comment.body) < 100:
+                new_comments.append(comment)
+        self.requests += comments_read // 100 + 1
+        if not first_poll and not reached_watermark:
+            # Reddit serves at most about 1000 comments of a listing
+            self.gaps += 1
+            logger.warning(f"Read {comments_read} new comments without reaching the last poll's newest, comments in between were missed")
+        self.newest_comment_id = newest_comment_id
+        return new_comments
+
     def get_new_messages(self) -> list[str]:
         # Wait for new comments to be available
         self.new_comment_event.wait()
@@ -64,8 +108,8 @@ class NBACommentsTextSource(RedditTextSource):
         recent_comments = []
         with self.queue_lock:  # Ensure thread-safe access to the priority queue
             while len(self.comment_queue) > 0 and len(recent_comments) < 3:
-                _, _, comment = heapq.heappop(self.comment_queue)
-                recent_comments.append(comment.body)  # Add the comment body to the list
+                _, _, body = heapq.heappop(self.comment_queue)
+                recent_comments.append(body)  # Add the comment body to the list
 
         # Reset the event if there are no more comments in the queue
         if len(self.comment_queue) == 0:
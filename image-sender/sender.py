@@ -1,15 +1,28 @@
-from queue import Empty, Queue
+from queue import Empty
 from threading import Thread
+import time
 import zmq
 import logging
 
+from frame_maker import OutgoingFrames
+from frame_queue import FrameQueue
+from pipeline_config import PipelineConfig
+
 logger = logging.getLogger(__name__)
 
 class ZMQSender:
-    def __init__(self, frame_queue: Queue[bytes]):
+    def __init__(self, frame_queue: FrameQueue, config: PipelineConfig = PipelineConfig()):
         self.frame_queue = frame_queue
+        self.config = config
         self.context = zmq.Context()
         self.sock = self.context.socket(zmq.PUB)
+        # Socket options only apply to connections made after they are set, so before bind
+        if config.send_hwm is not None:
+            self.sock.setsockopt(zmq.SNDHWM, config.send_hwm)
+        if config.conflate:
+            self.sock.setsockopt(zmq.CONFLATE, 1)
+            if config.display_profiles is not None and len(config.display_profiles) > 1:
+                logger.warning("ZMQ_CONFLATE keeps one message per subscriber across all topics, displays may miss frames of their profile")
         self.sock.bind("tcp://*:5555")
         self.running = False
         logger.info("Created ZMQSender")
@@ -19,20 +32,38 @@ class ZMQSender:
         while self.running:
             #logger.debug("Getting frame from queue")
             try:
-                frame = self.frame_queue.get(timeout=1.0)
-                if frame is None:
+                outgoing: OutgoingFrames = self.frame_queue.get(timeout=1.0)
+                if outgoing is None:
                     continue
-                try:
-                    topic = '/frames'
-                    #logger.debug("Sending frame over ZMQ")
-                    self.sock.send(topic.encode('ascii') + frame)
-                    self.frame_queue.task_done()
-                except zmq.ZMQError as e:
-                    logger.error(f"Failed to send frame: {e}")
+                source_metrics = outgoing.source_metrics
+                start_time = time.monotonic()
+                source_metrics.stages["queue_wait"].observe(start_time - outgoing.queued_time)
+                # One encoded frame per display profile, each on its own topic
+                for topic, envelope, frame in outgoing.frames:
+                    try:
+                        #logger.debug("Sending frame over ZMQ")
+                        self.send_frame(topic, envelope, frame)
+                        source_metrics.sent_bytes += len(frame)
+                    except zmq.ZMQError as e:
+                        logger.error(f"Failed to send frame on {topic.decode('ascii')}: {e}")
+                end_time = time.monotonic()
+                source_metrics.stages["send"].observe(end_time - start_time)
+                source_metrics.sent_frames += 1
+                source_metrics.send_times.append(end_time)
+                # From the capture of the frame's content, a camera's shutter or the start of the render
+                source_metrics.publish_latency.observe((time.time_ns() - outgoing.capture_time_ns) / 1e9)
             except Empty:
                 continue
         logger.info("Sender loop stopping")
 
+    def send_frame(self, topic: bytes, envelope: bytes, frame: bytes) -> None:
+        if not self.config.frame_envelope:
+            self.sock.send(topic + frame)
+        elif self.config.conflate:
+            self.sock.send(topic + envelope + frame)
+        else:
+            self.sock.send_multipart((topic, envelope, frame))
+
     def start(self):
         self.running = True
         self.sender_thread = Thread(target=self.sender)
@@ -0,0 +1,98 @@
+import logging
+from threading import Lock, Thread
+import time
+
+from frame_sources.frame_source import FrameSource
+
+logger = logging.getLogger(__name__)
+
+class SourcePool:
+    # Enters frame sources ahead of the switch to them and exits them in the background
+    # once nothing uses them. Every acquire() is paired with one release(), a source is
+    # exited when the last of its holders releases it, so a switch that was superseded
+    # never exits a source a newer switch is preparing. Sources in keep_warm stay entered
+    # from start() to stop(), so their background threads keep their data current while
+    # another source shows.
+    def __init__(self, keep_warm: list[FrameSource] | None = None, ready_timeout: float = 10.0):
+        self.keep_warm = list(keep_warm or [])
+        self.ready_timeout = ready_timeout
+        self.lock = Lock()
+        self.source_locks: dict[FrameSource, Lock] = {}
+        self.entered: set[FrameSource] = set()
+        # Holders per source, acquires not yet released
+        self.wanted: dict[FrameSource, int] = {}
+        self.exit_threads: list[Thread] = []
+
+    def get_source_lock(self, source: FrameSource) -> Lock:
+        with self.lock:
+            return self.source_locks.setdefault(source, Lock())
+
+    def start(self) -> None:
+        for source in self.keep_warm:
+            Thread(target=self.warm_up, args=(source,), name=f"Warm {source.name}", daemon=True).start()
+
+    def warm_up(self, source: FrameSource) -> None:
+        try:
+            # No first frame, the source might be the one already showing
+            self.acquire(source, render_first_frame=False)
+            logger.info(f"Keeping {source.name} warm")
+        except Exception:
+            logger.error(f"Failed to warm up {source.name}", exc_info=True)
+
+    def acquire(self, source: FrameSource, render_first_frame: bool = True) -> None:
+        # Blocks until the source is entered, has its data and rendered a first frame.
+        # Counts as a holder even if it raises, release() it either way.
+        start_time = time.monotonic()
+        with self.lock:
+            self.wanted[source] = self.wanted.get(source, 0) + 1
+        with self.get_source_lock(source):
+            if source not in self.entered:
+                source.__enter__()
+                self.entered.add(source)
+
+        deadline = start_time + self.ready_timeout
+        while not source.is_ready():
+            if time.monotonic() > deadline:
+                logger.warning(f"{source.name} not ready after {self.ready_timeout}s, switching to it anyway")
+                break
+            time.sleep(0.05)
+        if render_first_frame:
+            # Warms the source's caches, and a source that can't render never gets cut over to
+            source.create_frame()
+        logger.info(f"Prepared {source.name} in {1000 * (time.monotonic() - start_time):.0f}ms")
+
+    def release(self, source: FrameSource) -> None:
+        with self.lock:
+            holders = self.wanted.get(source, 0) - 1
+            if holders > 0:
+                self.wanted[source] = holders
+                return
+            self.wanted.pop(source, None)
+            if source in self.keep_warm:
+                return
+            # Exiting can mean joining threads or logging out, never on the caller's thread
+            exit_thread = Thread(target=self.exit_if_unwanted, args=(source,), name=f"Exit {source.name}")
+            self.exit_threads = [thread for thread in self.exit_threads if thread.is_alive()]
+            self.exit_threads.append(exit_thread)
+        exit_thread.start()
+
+    def exit_if_unwanted(self, source: FrameSource) -> None:
+        with self.get_source_lock(source):
+            # Acquired again before this got the lock, leave it entered
+            with self.lock:
+                if self.wanted.get(source, 0) > 0 or source not in self.entered:
+                    return
+                self.entered.discard(source)
+            try:
+                source.__exit__(None, None, None)
+            except Exception:
+                logger.error(f"Failed to exit {source.name}", exc_info=True)
+
+    def stop(self) -> None:
+        with self.lock:
+            self.wanted.clear()
+            exit_threads = list(self.exit_threads)
+        for thread in exit_threads:
+            thread.join()
+        for source in list(self.entered):
+            self.exit_if_unwanted(source)
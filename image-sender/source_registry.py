@@ -0,0 +1,119 @@
+# Frame sources are declared here by name and only imported and constructed when first used,
+# so a deployment pays for cv2, praw or FlightRadar24 only if it shows those sources.
+# Run from the image-sender directory for the cold import and construction cost of each
+# source, each measured in a fresh interpreter: python source_registry.py
+import argparse
+import importlib
+import json
+import logging
+import subprocess
+import sys
+from threading import Lock
+import time
+from typing import NamedTuple
+
+from frame_sources.frame_source import FrameSource
+
+logger = logging.getLogger(__name__)
+
+class SourceSpec(NamedTuple):
+    module: str
+    class_name: str
+
+SOURCE_SPECS: dict[str, SourceSpec] = {
+    "Count": SourceSpec("frame_sources.count_frame_source", "CountFrameSource"),
+    "Clock": SourceSpec("frame_sources.clock_frame_source", "ClockFrameSource"),
+    "Camera": SourceSpec("frame_sources.usb_cam_frame_source", "USBCameraFrameSource"),
+    "Square": SourceSpec("frame_sources.moving_green_square_source", "MovingSquareSource"),
+    "ScrollingText": SourceSpec("frame_sources.scrolling_text_frame_source", "ScrollingTextFrameSource"),
+    "Plane Tracker": SourceSpec("frame_sources.flight_data_frame_source", "FlightDataFrameSource"),
+    "Analog Clock": SourceSpec("frame_sources.analog_clock_frame_source", "AnalogClockFrameSource"),
+    "Compositor": SourceSpec("frame_sources.compositor_frame_source", "CompositorFrameSource")
+}
+
+class SourceRegistry:
+    def __init__(self, specs: dict[str, SourceSpec] = SOURCE_SPECS):
+        self.specs = specs
+        self.sources: dict[str, FrameSource] = {}
+        self.lock = Lock()
+        self.startup_times: dict[str, dict] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    def __getitem__(self, name: str) -> FrameSource:
+        source = self.sources.get(name)
+        if source is None:
+            with self.lock:
+                source = self.sources.get(name)
+                if source is None:
+                    source = self.load(name)
+                    self.sources[name] = source
+        return source
+
+    def load(self, name: str) -> FrameSource:
+        spec = self.specs[name]
+        modules_before = len(sys.modules)
+        start_time = time.perf_counter()
+        module = importlib.import_module(spec.module)
+        import_time = time.perf_counter() - start_time
+        modules_imported = len(sys.modules) - modules_before
+
+        start_time = time.perf_counter()
+        source = getattr(module, spec.class_name)()
+        init_time = time.perf_counter() - start_time
+
+        # Dependencies shared with sources loaded earlier only count for the first of them
+        self.startup_times[name] = {
+            "ImportMs": 1000 * import_time,
+            "ModulesImported": modules_imported,
+            "InitMs": 1000 * init_time
+        }
+        logger.info(f"Loaded source {name} in {1000 * (import_time + init_time):.0f}ms ({1000 * import_time:.0f}ms importing {modules_imported} modules)")
+        return source
+
+    def get_name(self, source: FrameSource) -> str:
+        for name, loaded_source in list(self.sources.items()):
+            if loaded_source is source:
+                return name
+        return source.name
+
+    def get_startup_report(self) -> dict:
+        return dict(self.startup_times)
+
+def measure_cold(name: str) -> dict:
+    # A fresh interpreter, so the source pays for every dependency it pulls in
+    start_time = time.perf_counter()
+    import frame_maker, sender  # The rest of the pipeline, imported by every deployment
+    pipeline_import_time = time.perf_counter() - start_time
+    registry = SourceRegistry()
+    registry[name]
+    report = registry.get_startup_report()[name]
+    report["PipelineImportMs"] = 1000 * pipeline_import_time
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import and construction cost of each frame source")
+    parser.add_argument("--source", help="Measure this source in the current interpreter and print JSON")
+    args = parser.parse_args()
+
+    if args.source is not None:
+        print(json.dumps(measure_cold(args.source)))
+        return
+
+    print(f"{'Source':<16}{'Import ms':>12}{'Modules':>10}{'Init ms':>10}")
+    pipeline_import_times = []
+    for name in SOURCE_SPECS:
+        result = subprocess.run([sys.executable, __file__, "--source", name], capture_output=True, text=True)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}"
+            print(f"{name:<16}  failed: {error}")
+            continue
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{name:<16}{report['ImportMs']:>12.0f}{report['ModulesImported']:>10}{report['InitMs']:>10.1f}")
+        pipeline_import_times.append(report["PipelineImportMs"])
+    if pipeline_import_times:
+        print(f"Pipeline modules every deployment imports first: {min(pipeline_import_times):.0f}ms")
+
+if __name__ == "__main__":
+    main()